@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+from email_agent.config import settings
+from email_agent.gmail.service import build_gmail_service
+from email_agent.llm.ollama_client import OllamaClient
+from email_agent.pipeline.backfill import GMAIL_EPOCH, Backfill, parse_day
+
+
+def main():
+    p = argparse.ArgumentParser(description="Label a whole mailbox: parallel date-range shards, resumable.")
+    p.add_argument("--name", default="full", help="job name; re-run with the same name to resume")
+    p.add_argument("--since", default=GMAIL_EPOCH, help="oldest day to cover (YYYY/MM/DD)")
+    p.add_argument("--until", default=None, help="newest day to cover, exclusive (default: tomorrow)")
+    p.add_argument("--shard-days", type=float, default=30.0)
+    p.add_argument("--workers", type=int, default=int(os.getenv("BACKFILL_WORKERS", "4")))
+    p.add_argument("--page-size", type=int, default=100, help="messages listed (and checkpointed) per page")
+    p.add_argument("--q", default=None, help="extra Gmail search query to restrict the backfill")
+    p.add_argument("--thread-mode", action="store_true")
+    p.add_argument("--verbose", action="store_true", help="print every labeling decision")
+    args = p.parse_args()
+
+    since_ts = parse_day(args.since)
+    until_ts = parse_day(args.until) if args.until else int(time.time()) + 86400
+
+    # getProfile is 1 quota unit and gives the denominator for the ETA (not meaningful with --q)
+    total = None
+    if not args.q:
+        total = int(build_gmail_service().users().getProfile(userId="me").execute().get("messagesTotal", 0)) or None
+
+    tty = sys.stdout.isatty()
+
+    def on_progress(line: str) -> None:
+        print(f"\r{line}\033[K" if tty else line, end="" if tty else "\n", flush=True)
+
+    backfill = Backfill(
+        args.name,
+        store_path=os.getenv("STATE_DB_PATH", "state/sabaki.db"),
+        service_factory=build_gmail_service,
+        client=OllamaClient(settings.ollama_base_url, settings.ollama_model, max_connections=args.workers),
+        q=args.q,
+        page_size=args.page_size,
+        workers=args.workers,
+        thread_mode=args.thread_mode,
+        log=print if args.verbose else (lambda msg: None),
+    )
+    summary = backfill.run(since_ts=since_ts, until_ts=until_ts, shard_days=args.shard_days,
+                           total_messages=total, on_progress=on_progress)
+
+    if tty:
+        print()
+    state = "interrupted, re-run to resume" if summary.interrupted else (
+        "complete" if summary.shards_done == summary.shards else "incomplete, re-run to resume")
+    print(
+        f"\nBackfill '{args.name}' {state}: shards={summary.shards_done}/{summary.shards}, "
+        f"checked={summary.checked}, labeled={summary.labeled}, skipped={summary.skipped}, errors={summary.errors}"
+    )
+
+
+if __name__ == "__main__":
+    main()
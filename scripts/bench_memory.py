@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import argparse
+import json
+
+from email_agent.bench.memory import run_memory_benchmark, run_pipeline_memory_benchmark
+
+
+def main():
+    p = argparse.ArgumentParser(description="tracemalloc peak memory: legacy vs compact vs streamed message records, or a whole pipeline run.")
+    p.add_argument("--emails", type=int, default=10_000)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--body-chars", type=int, default=4000, help="filler appended to every synthetic body")
+    p.add_argument("--body-share", type=float, default=0.2, help="fraction of messages whose body is read")
+    p.add_argument("--pipeline", action="store_true",
+                   help="measure a whole LabelPipeline.run instead of the fetch helpers")
+    p.add_argument("--json", action="store_true", help="print the raw JSON report")
+    args = p.parse_args()
+
+    if args.pipeline:
+        report = run_pipeline_memory_benchmark(args.emails, seed=args.seed, body_chars=args.body_chars)
+        modes = ("run", "run_detailed")
+    else:
+        report = run_memory_benchmark(args.emails, seed=args.seed, body_chars=args.body_chars,
+                                      body_share=args.body_share)
+        modes = ("legacy", "list", "stream")
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    read = f", {report['body_share']:.0%} bodies read" if "body_share" in report else ""
+    print(f"{report['messages']} messages, ~{report['body_chars']} body chars{read}\n")
+    print(f"{'mode':12s} {'peak MB':>9s} {'B/message':>10s} {'seconds':>8s}")
+    for mode in modes:
+        r = report[mode]
+        print(f"{mode:12s} {r['peak_mb']:9.2f} {r['bytes_per_message']:10d} {r['elapsed_s']:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
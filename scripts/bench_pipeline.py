@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import argparse
+import json
+
+from email_agent.bench.harness import BenchConfig, run_benchmark
+
+
+def main():
+    p = argparse.ArgumentParser(description="End-to-end pipeline benchmark (fake Gmail + fake Ollama).")
+    p.add_argument("--emails", type=int, default=500)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--thread-mode", action="store_true")
+    p.add_argument("--no-reputation", action="store_true")
+    p.add_argument("--no-pushdown", action="store_true", help="skip the Gmail-search labeling pre-pass")
+    p.add_argument("--llm-workers", type=int, default=1, help="0: call the LLM inline, in listing order")
+    p.add_argument("--gmail-latency-ms", type=float, default=0.0)
+    p.add_argument("--llm-latency-ms", type=float, default=50.0)
+    p.add_argument("--llm-jitter-ms", type=float, default=0.0)
+    p.add_argument("--llm-load-ms", type=float, default=0.0)
+    p.add_argument("--llm-error-rate", type=float, default=0.0)
+    p.add_argument("--llm-invalid-json-rate", type=float, default=0.0)
+    p.add_argument("--out", help="write JSON report here (default: stdout)")
+    args = p.parse_args()
+
+    report = run_benchmark(BenchConfig(
+        emails=args.emails,
+        seed=args.seed,
+        thread_mode=args.thread_mode,
+        reputation=not args.no_reputation,
+        llm_workers=args.llm_workers,
+        pushdown=not args.no_pushdown,
+        gmail_latency_s=args.gmail_latency_ms / 1000,
+        llm_latency_s=args.llm_latency_ms / 1000,
+        llm_jitter_s=args.llm_jitter_ms / 1000,
+        llm_load_s=args.llm_load_ms / 1000,
+        llm_error_rate=args.llm_error_rate,
+        llm_invalid_json_rate=args.llm_invalid_json_rate,
+    ))
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"✅ {report['emails_per_sec']} emails/sec, p99={report['latency_ms']['p99']}ms -> {args.out}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import argparse
+
+from email_agent.bench.capture import iter_full_messages, write_corpus
+
+
+def main():
+    p = argparse.ArgumentParser(description="Dump raw Gmail messages (format=full) to a gzipped JSONL corpus.")
+    p.add_argument("out", help="output path, e.g. corpus/inbox.jsonl.gz")
+    p.add_argument("--max", type=int, default=500, help="number of most recent messages")
+    p.add_argument("--q", help="Gmail search query to capture instead of the whole inbox")
+    p.add_argument("--synthetic", type=int, metavar="N",
+                   help="write N synthetic benchmark emails instead of reading Gmail")
+    args = p.parse_args()
+
+    if args.synthetic:
+        from email_agent.bench.corpus import synthetic_corpus
+        messages, _ = synthetic_corpus(args.synthetic)
+    else:
+        from email_agent.gmail.service import build_gmail_service
+        # read-only: capture never modifies the mailbox
+        messages = iter_full_messages(build_gmail_service(), q=args.q, limit=args.max)
+
+    n = write_corpus(args.out, messages)
+    print(f"✅ Captured {n} messages -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
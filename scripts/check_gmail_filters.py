@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+from typing import Any, Dict, List
+
+from email_agent.bench.corpus import ATS_DOMAINS, COMPANIES, make_message, synthetic_corpus
+from email_agent.bench.fake_gmail import FakeGmailService
+from email_agent.bench.fake_ollama import FakeOllamaServer
+from email_agent.config import JOB_LABELS, PROCESSED_LABEL
+from email_agent.gmail.service import FILTERS_SCOPE, SCOPES
+from email_agent.llm.ollama_client import OllamaClient
+from email_agent.pipeline.filters import GmailFilters, mine_candidates
+from email_agent.pipeline.reputation import SenderReputation
+from email_agent.pipeline.runner import LabelPipeline
+from email_agent.state.store import StateStore
+
+_NEW_TS = 1_745_000_000.0      # new mail arrives after the whole history
+
+
+def _quiet_rejections(n: int) -> tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """
+    Rejections sent from the same ATS address and with the same subject as the confirmations,
+    worded with none of the guard's rejection terms: only reading the mail can tell.
+    """
+    messages, truth = [], {}
+    for i in range(n):
+        company = COMPANIES[i % len(COMPANIES)]
+        msg_id = f"q{i:04d}"
+        messages.append(make_message(
+            msg_id=msg_id, thread_id=msg_id,
+            from_=f"{company} Careers <no-reply@{ATS_DOMAINS[i % len(ATS_DOMAINS)]}>",
+            subject=f"Thank you for applying to {company}",
+            body="Thanks for your interest. After careful review we will be proceeding with a different profile.",
+            ts=_NEW_TS + 3600 * i, label_ids=["INBOX", "UNREAD"],
+        ))
+        truth[msg_id] = "REJECTED"
+    return messages, truth
+
+
+def _job_labels(gmail: FakeGmailService, msg_id: str) -> list[str]:
+    names = {l["id"]: l["name"] for l in gmail.labels.values()}
+    return [names[l] for l in gmail.messages[msg_id]["labelIds"] if names.get(l) in JOB_LABELS]
+
+
+def main():
+    p = argparse.ArgumentParser(
+        description="Learn Gmail filters from a labeled history (fake Gmail + fake Ollama), deliver new mail "
+                    "through them and check nothing a filter labels on arrival is wrong.",
+    )
+    p.add_argument("--history", type=int, default=1500, help="messages labeled by the agent before mining")
+    p.add_argument("--new", type=int, default=500, help="messages delivered after the filters are installed")
+    p.add_argument("--quiet-rejections", type=int, default=20,
+                   help="extra new rejections that look like ATS confirmations (subject + sender)")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    history, _ = synthetic_corpus(args.history, seed=args.seed)
+    new, new_truth = synthetic_corpus(args.new, seed=args.seed + 7, start_ts=_NEW_TS)
+    for m in new:
+        m["id"], m["threadId"] = "n" + m["id"], "n" + m["threadId"]
+    truth = {"n" + k: v for k, v in new_truth.items()}
+    quiet, quiet_truth = _quiet_rejections(args.quiet_rejections)
+    new += quiet
+    truth.update(quiet_truth)
+
+    gmail = FakeGmailService(history)
+    store = StateStore(os.path.join(tempfile.mkdtemp(prefix="gmail_filters_"), "state.db"))
+    problems = []
+    try:
+        with FakeOllamaServer(latency_s=0.005) as llm:
+            client = OllamaClient(llm.url, "fake")
+            pipeline = LabelPipeline(gmail, store=store, client=client, reputation=SenderReputation(store),
+                                     log=lambda _: None)
+            pipeline.run(max_emails=args.history)
+
+            filters = GmailFilters(gmail, store)
+            candidates = mine_candidates(store)
+            dry = filters.install(candidates, dry_run=True)
+            created = filters.install(candidates)
+            again = filters.install(candidates)
+            print(f"\ncandidates {len(candidates)}: dry run {len(dry)}, created {len(created)}, second install {len(again)}")
+            if len(dry) != len(created) or again:
+                problems.append("install is not idempotent (dry run / second run disagree)")
+
+            filtered = gmail.deliver(new)
+            on_arrival = {m["id"]: _job_labels(gmail, m["id"]) for m in new
+                          if PROCESSED_LABEL in {gmail.labels[l]["name"] for l in gmail.messages[m["id"]]["labelIds"]
+                                                 if l in gmail.labels}}
+            wrong_on_arrival = {mid: labels for mid, labels in on_arrival.items()
+                                if labels != ([] if truth[mid] == "OTHERS" else [truth[mid]])}
+
+            gmail.reset_stats()
+            summary = pipeline.run(max_emails=len(new))
+            calls = gmail.stats()
+            client.close()
+
+        wrong = [mid for mid in truth if _job_labels(gmail, mid) != ([] if truth[mid] == "OTHERS" else [truth[mid]])]
+        print(f"delivered {len(new)}: {filtered} labeled on arrival by filters, {len(wrong_on_arrival)} of them wrong")
+        print(f"agent run: checked {summary.checked}, labeled {summary.labeled}, skipped {summary.skipped}, "
+              f"gmail calls {calls['http_calls']} {calls['by_method']}")
+        print(f"wrong labels after the run (filters + agent): {len(wrong)} of {len(truth)}")
+
+        # the token loses gmail.settings.basic after the first delete: Gmail answers 403 from then on
+        def revoke_after_first(line: str) -> None:
+            print(line)
+            gmail.scopes = set(SCOPES) - {FILTERS_SCOPE}
+
+        filters.log = revoke_after_first
+        partial = filters.rollback(everything=True)
+        filters.log = print
+        gmail.scopes = None
+        recorded = {row[0] for row in filters.installed()}
+        print(f"rollback refused partway: removed {partial}, recorded {len(recorded)}, in Gmail {len(gmail.filters)}")
+        if partial != 1 or recorded != set(gmail.filters):
+            problems.append("a rollback refused partway left the recorded filters out of step with Gmail")
+
+        removed = filters.rollback(everything=True)
+        print(f"rollback: removed {removed}, left {len(gmail.filters)}")
+        if gmail.filters or filters.installed():
+            problems.append(f"{len(gmail.filters)} filter(s) left after rollback")
+
+        gmail.scopes = set(SCOPES) - {FILTERS_SCOPE}
+        try:
+            filters.install(candidates)
+            problems.append("install without the filters scope did not fail")
+        except RuntimeError as ex:
+            print(f"install without the scope: {ex}")
+        if gmail.filters or filters.installed():
+            problems.append("install without the filters scope left filters behind")
+        if wrong_on_arrival:
+            sample = list(wrong_on_arrival.items())[:3]
+            problems.append(f"{len(wrong_on_arrival)} message(s) labeled wrong on arrival, e.g. {sample}")
+    finally:
+        store.close()
+
+    for problem in problems:
+        print(f"❌ {problem}")
+    if problems:
+        sys.exit(1)
+    print("✅ every message a filter labeled on arrival has its true label")
+
+
+if __name__ == "__main__":
+    main()
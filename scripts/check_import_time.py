@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(os.path.dirname(HERE), "src")
+
+# Each target runs in a fresh interpreter; only the code inside the timer is measured
+# (interpreter startup itself is reported separately as "python").
+TARGETS = {
+    "python": "pass",
+    # module-level imports of the cron entry point (main() is not called)
+    "script": f"import runpy; runpy.run_path({os.path.join(HERE, 'analyze_and_label_recent.py')!r}, run_name='__budget__')",
+    # what the first Gmail call additionally needs: auth + client imports, service from the pinned discovery doc
+    "gmail_service": (
+        "from email_agent.gmail.service import gmail_discovery_document\n"
+        "from google.oauth2.credentials import Credentials\n"
+        "from googleapiclient.discovery import build_from_document\n"
+        "build_from_document(gmail_discovery_document(), credentials=Credentials(token='x'))"
+    ),
+    "app": "import email_agent.app",
+}
+
+DEFAULT_BUDGET_MS = {"script": 150.0, "gmail_service": 600.0, "app": 1000.0}
+
+_TIMED = """import time
+_t0 = time.perf_counter()
+{code}
+print(f"__elapsed_ms__={{(time.perf_counter() - _t0) * 1000:.3f}}")
+"""
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = SRC + (os.pathsep + env["PYTHONPATH"] if env.get("PYTHONPATH") else "")
+    env.setdefault("PYTHONDONTWRITEBYTECODE", "")
+    return env
+
+
+def time_target(code: str, runs: int) -> list[float]:
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _TIMED.format(code=code)],
+            env=_env(), capture_output=True, text=True, check=True,
+        ).stdout
+        line = next(l for l in out.splitlines() if l.startswith("__elapsed_ms__="))
+        samples.append(float(line.split("=", 1)[1]))
+    return samples
+
+
+def top_imports(code: str, n: int) -> list[tuple[float, str]]:
+    """Modules with the largest self time (python -X importtime) for one cold run."""
+    err = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=_env(), capture_output=True, text=True, check=True,
+    ).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us) / 1000, name.strip()))
+    return sorted(rows, reverse=True)[:n]
+
+
+def main():
+    p = argparse.ArgumentParser(description="Cold-start import-time budget for the CLI entry point and the FastAPI app.")
+    p.add_argument("--runs", type=int, default=5, help="fresh interpreters per target (median is reported)")
+    p.add_argument("--top", type=int, default=8, help="slowest modules (self time) to list per target")
+    for name, ms in DEFAULT_BUDGET_MS.items():
+        p.add_argument(f"--budget-{name.replace('_', '-')}-ms", type=float, default=ms, dest=f"budget_{name}")
+    args = p.parse_args()
+
+    # first run pins the discovery document; keep that one-off write out of the measurements
+    subprocess.run([sys.executable, "-c", TARGETS["gmail_service"]], env=_env(), check=True)
+
+    over = []
+    for name, code in TARGETS.items():
+        samples = time_target(code, args.runs)
+        median = statistics.median(samples)
+        budget = getattr(args, f"budget_{name}", None)
+        status = ""
+        if budget is not None:
+            status = "ok" if median <= budget else "OVER BUDGET"
+            if median > budget:
+                over.append(name)
+        print(f"{name:14s} median={median:7.1f}ms  min={min(samples):7.1f}ms"
+              + (f"  budget={budget:.0f}ms  {status}" if budget is not None else ""))
+        if name != "python" and args.top:
+            for ms, module in top_imports(code, args.top):
+                print(f"    {ms:7.1f}ms  {module}")
+
+    if over:
+        print(f"\nImport-time budget exceeded: {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
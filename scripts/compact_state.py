@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import os
+
+from email_agent.pipeline.reputation import SenderReputation
+from email_agent.state.store import StateStore
+
+
+def main():
+    keep_days = float(os.getenv("STATE_KEEP_DAYS", "180"))
+
+    store = StateStore.from_env()
+    pruned = SenderReputation.from_env(store).prune()
+    removed = store.compact(keep_days=keep_days)
+    store.close()
+
+    print(f"✅ Compacted {store.path}: removed={removed} (kept last {keep_days:g} days), senders_pruned={pruned}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import argparse
+
+from email_agent.gmail.service import build_gmail_service
+from email_agent.pipeline.filters import GmailFilters, filter_options_from_env, mine_candidates
+from email_agent.schemas import JobLabel
+from email_agent.state.store import StateStore
+
+
+def main():
+    defaults = filter_options_from_env()
+    p = argparse.ArgumentParser(description="Turn confident sender / subject -> label history into Gmail filters.")
+    p.add_argument("--dry-run", action="store_true", help="print what would be created, change nothing")
+    p.add_argument("--min-support", type=int, default=defaults["min_support"], help="decisions needed per sender/subject")
+    p.add_argument("--min-share", type=float, default=defaults["min_share"], help="share of them on one label")
+    p.add_argument("--lookback-days", type=float, default=defaults["lookback_days"])
+    p.add_argument("--labels", default=None, help="comma-separated labels to allow (default: all label-only ones)")
+    p.add_argument("--max", type=int, default=50, help="filters created per run (Gmail allows 1000 per account)")
+    p.add_argument("--list", action="store_true", help="show the filters this tool has installed")
+    p.add_argument("--rollback", nargs="?", const=-1, type=int, metavar="BATCH",
+                   help="delete the filters of an install batch (default: the latest)")
+    p.add_argument("--rollback-all", action="store_true", help="delete every filter this tool installed")
+    args = p.parse_args()
+
+    store = StateStore.from_env()
+    try:
+        run(args, GmailFilters(build_gmail_service(), store), store)
+    finally:
+        store.close()
+
+
+def run(args, filters: GmailFilters, store: StateStore) -> None:
+    if args.list:
+        for filter_id, batch, kind, value, label, support, share in filters.installed():
+            print(f"batch {batch}  {kind}:{value} -> {label} ({share:.0%} of {support})  [{filter_id}]")
+        return
+
+    if args.rollback is not None or args.rollback_all:
+        batch = None if args.rollback in (None, -1) else args.rollback
+        removed = filters.rollback(batch=batch, everything=args.rollback_all)
+        print(f"\nRemoved {removed} filter(s).")
+        return
+
+    labels = [JobLabel(l.strip()) for l in args.labels.split(",")] if args.labels else None
+    candidates = mine_candidates(
+        store,
+        min_support=args.min_support,
+        min_share=args.min_share,
+        lookback_days=args.lookback_days,
+        labels=labels,
+    )
+    created = filters.install(candidates[: args.max], dry_run=args.dry_run)
+    verb = "Would create" if args.dry_run else "Created"
+    print(f"\n{verb} {len(created)} filter(s) from {len(candidates)} candidate(s).")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import argparse
+import json
+
+from email_agent.bench.replay import replay_corpus
+
+
+def main():
+    p = argparse.ArgumentParser(description="Replay a captured corpus through the full pipeline (no Gmail calls).")
+    p.add_argument("corpus", help="gzipped JSONL from scripts/capture_corpus.py")
+    p.add_argument("--llm", choices=["fake", "real"], default="fake",
+                   help="fake: local stub server; real: OLLAMA_BASE_URL / OLLAMA_MODEL")
+    p.add_argument("--llm-latency-ms", type=float, default=0.0, help="fake LLM latency")
+    p.add_argument("--thread-mode", action="store_true")
+    p.add_argument("--reputation", action="store_true", help="enable sender reputation during replay")
+    p.add_argument("--baseline", help="previous replay report (JSON) to diff labels against")
+    p.add_argument("--out", help="write JSON report here (usable as a later --baseline)")
+    args = p.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["decisions"]
+
+    report = replay_corpus(
+        args.corpus,
+        llm=args.llm,
+        llm_latency_s=args.llm_latency_ms / 1000,
+        thread_mode=args.thread_mode,
+        reputation=args.reputation,
+        baseline=baseline,
+    )
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    print(f"emails={report['emails']} labeled={report['labeled']} errors={report['errors']} "
+          f"elapsed={report['elapsed_s']}s throughput={report['emails_per_sec']}/s "
+          f"p50={report['latency_ms']['p50']}ms p99={report['latency_ms']['p99']}ms llm_calls={report['llm_calls']}")
+    if "diff" in report:
+        d = report["diff"]
+        print(f"diff vs baseline: compared={d['compared']} changed={d['changed']}")
+        for transition, count in d["transitions"].items():
+            print(f"  {count:>5}  {transition}")
+        for c in d["changes"][:20]:
+            print(f"  {c['before']:>15} -> {c['after']:<15} {c['subject'][:60]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import argparse
+import os
+import time
+
+from email_agent.config import settings
+from email_agent.llm.gateway import start_gateway
+from email_agent.pipeline.accounts import account_from_token, run_accounts
+
+
+def main():
+    p = argparse.ArgumentParser(description="Label several Gmail accounts in one run (process pool, shared LLM).")
+    p.add_argument("tokens", nargs="*", help="token files, one per account (default: $ACCOUNT_TOKENS, comma-separated)")
+    p.add_argument("--workers", type=int, default=None, help="worker processes (default: min(accounts, cores))")
+    p.add_argument("--llm-concurrency", type=int, default=int(os.getenv("OLLAMA_NUM_PARALLEL", "2")),
+                   help="max in-flight Ollama requests across all accounts")
+    p.add_argument("--quota-units", type=float, default=float(os.getenv("ACCOUNT_QUOTA_UNITS", "25000")),
+                   help="Gmail quota units each account may spend this run")
+    p.add_argument("--batch", type=int, default=50, help="messages per scheduling slice")
+    p.add_argument("--max-emails", type=int, default=int(os.getenv("MAX_EMAILS", "50")), help="per account")
+    p.add_argument("--state-dir", default=os.getenv("STATE_DIR", "state"))
+    p.add_argument("--thread-mode", action="store_true")
+    args = p.parse_args()
+
+    tokens = args.tokens or [t for t in os.getenv("ACCOUNT_TOKENS", "").split(",") if t]
+    if not tokens:
+        p.error("no account token files given")
+    accounts = [account_from_token(t, state_dir=args.state_dir, quota_units=args.quota_units) for t in tokens]
+
+    manager, gateway = start_gateway(
+        settings.ollama_base_url, settings.ollama_model, max_concurrency=args.llm_concurrency
+    )
+    t0 = time.perf_counter()
+    try:
+        reports = run_accounts(
+            accounts,
+            gateway=gateway,
+            workers=args.workers,
+            batch_size=args.batch,
+            max_emails=args.max_emails,
+            thread_mode=args.thread_mode,
+        )
+        llm_stats = gateway.stats()
+    finally:
+        manager.shutdown()
+    elapsed = time.perf_counter() - t0
+
+    print()
+    for r in reports:
+        flag = " (quota budget exhausted)" if r.quota_exhausted else ""
+        if r.error:
+            flag += f" (failed: {r.error})"
+        print(f"[{r.account}] checked={r.checked}, labeled={r.labeled}, skipped={r.skipped}, "
+              f"errors={r.errors}, quota_units={r.units_used:g}, llm_s={r.llm_s:.1f}, slices={r.slices}{flag}")
+    total = sum(r.checked for r in reports)
+    print(f"\nDone. accounts={len(reports)}, checked={total}, {total / elapsed:.1f} emails/sec, "
+          f"llm_requests={llm_stats['requests']}, llm_cache_hits={llm_stats['cache_hits']}")
+
+
+if __name__ == "__main__":
+    main()
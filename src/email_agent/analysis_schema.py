@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+from pydantic import BaseModel, Field
+
+from email_agent.schemas import JobLabel, Urgency
+
+
+class EmailAnalysis(BaseModel):
+    label: JobLabel = Field(..., description="Job pipeline label to apply")
+    urgency: Urgency = Field(..., description="How time-sensitive this email is")
+    needs_reply: bool = Field(..., description="Should Anand reply to this email?")
+    reasoning_brief: str = Field(..., description="One short line why this label was chosen")
@@ -3,22 +3,16 @@ from __future__ import annotations
 import json
 import os
 from fastapi import FastAPI, Header, HTTPException
-
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from fastapi.responses import PlainTextResponse
 
 from email_agent.gmail.fetch_meta import fetch_recent_email_meta
 from email_agent.gmail.labels import ensure_label
-from email_agent.pipeline.label_router import label_for_category, processed_label
-from email_agent.llm.gemini_client import analyze_with_gemini
+from email_agent.gmail.service import SCOPES, gmail_discovery_document
+from email_agent.pipeline.label_router import PROCESSED_LABEL, label_for_job
+from email_agent.metrics import metrics
 
 app = FastAPI()
 
-SCOPES = [
-    "https://www.googleapis.com/auth/gmail.readonly",
-    "https://www.googleapis.com/auth/gmail.modify",
-]
-
 def _env(name: str) -> str:
     v = os.getenv(name)
     if not v:
@@ -29,6 +23,11 @@ def _env(name: str) -> str:
 def health():
     return {"ok": True}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    # Prometheus text exposition format
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
 @app.post("/run")
 def run_agent(x_api_key: str | None = Header(default=None)):
     # Simple protection so strangers can't hit your endpoint
@@ -36,6 +35,11 @@ def run_agent(x_api_key: str | None = Header(default=None)):
     if expected and x_api_key != expected:
         raise HTTPException(status_code=401, detail="Unauthorized")
 
+    # Gmail client + Gemini SDK load on the first /run, not at app startup (keeps /health cold start fast)
+    from google.oauth2.credentials import Credentials
+    from googleapiclient.discovery import build_from_document
+    from email_agent.llm.gemini_client import analyze_with_gemini
+
     gemini_api_key = _env("GEMINI_API_KEY")
     gmail_token_json = _env("GMAIL_TOKEN_JSON")
 
@@ -45,15 +49,17 @@ def run_agent(x_api_key: str | None = Header(default=None)):
     token_info = json.loads(gmail_token_json)
 
     creds = Credentials.from_authorized_user_info(token_info, SCOPES)
-    service = build("gmail", "v1", credentials=creds, cache_discovery=False)
+    service = build_from_document(gmail_discovery_document(), credentials=creds)
 
-    processed_id = ensure_label(service, processed_label())
+    processed_id = ensure_label(service, PROCESSED_LABEL)
     emails = fetch_recent_email_meta(service, max_results=max_emails)
 
+    checked = 0
     labeled = 0
     skipped = 0
 
     for e in emails:
+        checked += 1
         if processed_id in e.label_ids:
             skipped += 1
             continue
@@ -67,7 +73,7 @@ def run_agent(x_api_key: str | None = Header(default=None)):
             snippet=e.snippet,
         )
 
-        cat_label_name = label_for_category(analysis.category)
+        cat_label_name = label_for_job(analysis.label)
         cat_id = ensure_label(service, cat_label_name)
 
         service.users().messages().modify(
@@ -78,4 +84,4 @@ def run_agent(x_api_key: str | None = Header(default=None)):
 
         labeled += 1
 
-    return {"ok": True, "checked": len(emails), "labeled": labeled, "skipped": skipped, "model": model}
\ No newline at end of file
+    return {"ok": True, "checked": checked, "labeled": labeled, "skipped": skipped, "model": model}
\ No newline at end of file
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import gzip
+import json
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from email_agent.gmail.fetch import iter_message_refs
+from email_agent.metrics import metrics
+
+# System labels kept on capture; user label IDs (PROCESSED, job labels) are mailbox-specific
+SYSTEM_LABELS = {"INBOX", "UNREAD", "SENT", "STARRED", "IMPORTANT", "SPAM", "TRASH", "DRAFT"}
+
+
+def write_corpus(path: str, messages: Iterable[Dict[str, Any]]) -> int:
+    """Gzipped JSONL, one Gmail `format=full` message resource per line. Returns count."""
+    n = 0
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for m in messages:
+            f.write(json.dumps(m, separators=(",", ":")))
+            f.write("\n")
+            n += 1
+    return n
+
+
+def read_corpus(path: str) -> Iterator[Dict[str, Any]]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def strip_user_labels(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop mailbox-specific label IDs so a replay sees every message as unprocessed."""
+    m = dict(message)
+    m["labelIds"] = [
+        l for l in message.get("labelIds", []) or []
+        if l in SYSTEM_LABELS or l.startswith("CATEGORY_")
+    ]
+    return m
+
+
+def iter_full_messages(service, *, q: Optional[str] = None, limit: Optional[int] = None):
+    """Raw `format=full` resources for listed messages (what replay needs: headers + body)."""
+    for msg_id, _ in iter_message_refs(service, q=q, limit=limit):
+        with metrics.span("gmail_request", method="messages.get", format="full"):
+            yield service.users().messages().get(userId="me", id=msg_id, format="full").execute()
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import base64
+import random
+from dataclasses import dataclass
+from email.utils import format_datetime
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark", "Wayne", "Wonka", "Cyberdyne", "Tyrell"]
+ROLES = ["Software Engineer", "Backend Engineer", "ML Engineer", "Data Scientist", "Full Stack Developer"]
+ATS_DOMAINS = ["greenhouse.io", "myworkday.com", "lever.co", "smartrecruiters.com"]
+FIRST_NAMES = ["Priya", "Jordan", "Alex", "Sam", "Taylor", "Morgan"]
+
+
+@dataclass
+class Template:
+    label: str                  # ground-truth JobLabel value
+    weight: float
+    from_: str
+    subject: str
+    body: str
+    extra_labels: tuple = ()
+
+
+# Mix roughly shaped like a job-search inbox: lots of alerts/confirmations/noise,
+# a few high-value messages, and some that need the LLM (no rule fires).
+TEMPLATES: List[Template] = [
+    Template("JOB_ALERTS", 20, "LinkedIn Job Alerts <jobalerts-noreply@linkedin.com>",
+             "New jobs for {role} in Austin",
+             "Jobs you may like: {role} at {company} and 24 more. See all job matches."),
+    Template("APPLIED", 18, "{company} Careers <no-reply@{ats}>",
+             "Thank you for applying to {company}",
+             "Hi, we have received your application for {role}. Our team will review it and reach out."),
+    Template("ADVERTISEMENTS", 14, "Deals <promo@shop{n}.com>",
+             "Last chance: 40% off everything",
+             "Our biggest sale of the season. Unsubscribe here.", ("CATEGORY_PROMOTIONS",)),
+    Template("REJECTED", 10, "{company} Recruiting <talent@{ats}>",
+             "Update on your application status",
+             "Thank you for your time. Unfortunately, we have decided not to move forward with your "
+             "application for {role}."),
+    Template("OTP_SECURITY", 8, "{company} Accounts <security@{company_l}.com>",
+             "Your verification code",
+             "Use verification code {code} to sign in. It expires in 10 minutes."),
+    Template("INTERVIEWS", 6, "{first} from {company} <{first_l}@{company_l}.com>",
+             "Interview availability - {role}",
+             "We'd like to schedule a 45 minute interview. Please share your availability this week."),
+    Template("ASSESSMENTS", 5, "{company} Hiring <hiring@{company_l}.com>",
+             "Next step: online assessment for {role}",
+             "Please complete the timed HackerRank assessment using the link below within 5 days."),
+    Template("RECOMMENDATIONS", 4, "Indeed <alert@indeed.com>",
+             "Roles recommended for you",
+             "Based on your profile, these similar jobs were recommended for you: {role} at {company}, "
+             "posted this week. Apply in one click, or save them to review later from your profile.\n\n"
+             "Unsubscribe from these emails.", ("CATEGORY_PROMOTIONS",)),
+    # job-board digest sorted into Promotions, footer past the snippet: not an ad
+    Template("JOB_ALERTS", 4, "Glassdoor Jobs <noreply@glassdoor.com>",
+             "{company} and 12 more companies are hiring",
+             "Jobs you may like: {role} openings near you, with company reviews and pay estimates for each "
+             "posting, picked from the searches you saved last month.\n\n"
+             "Unsubscribe or change how often you get these emails.", ("CATEGORY_PROMOTIONS",)),
+    # nothing below trips a rule: these reach the LLM
+    Template("IN PROCESS", 8, "{first} (Recruiter) <{first_l}.recruiter@{company_l}.com>",
+             "Quick chat about the {role} role?",
+             "I came across your profile and think you'd be a great fit for our {role} opening. "
+             "Are you open to a short call with the hiring manager?"),
+    Template("OTHERS", 7, "{first} <{first_l}@gmail.com>",
+             "Dinner on Friday?",
+             "Hey, are we still on for Friday? Let me know what time works."),
+]
+
+
+def _b64(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def make_message(
+    *,
+    msg_id: str,
+    thread_id: str,
+    from_: str,
+    subject: str,
+    body: str,
+    ts: float,
+    label_ids: List[str],
+    html: bool = False,
+) -> Dict[str, Any]:
+    """Gmail API `format=full` message resource (multipart/alternative, base64url parts)."""
+    parts = [{"mimeType": "text/plain", "body": {"data": _b64(body), "size": len(body)}}]
+    if html:
+        markup = f"<html><body><p>{body}</p></body></html>"
+        parts.append({"mimeType": "text/html", "body": {"data": _b64(markup), "size": len(markup)}})
+    date = format_datetime(datetime.fromtimestamp(ts, tz=timezone.utc))
+    return {
+        "id": msg_id,
+        "threadId": thread_id,
+        "labelIds": label_ids,
+        "snippet": body[:140],
+        "internalDate": str(int(ts * 1000)),
+        "sizeEstimate": len(body) + 600,
+        "payload": {
+            "mimeType": "multipart/alternative",
+            "headers": [
+                {"name": "From", "value": from_},
+                {"name": "To", "value": "me@example.com"},
+                {"name": "Subject", "value": subject},
+                {"name": "Date", "value": date},
+            ],
+            "body": {"size": 0},
+            "parts": parts,
+        },
+    }
+
+
+_FILLER = "\n\nThis message and any attachments are confidential and intended solely for the addressee. "
+
+
+def _filler(chars: int) -> str:
+    return (_FILLER * (chars // len(_FILLER) + 1))[:chars] if chars > 0 else ""
+
+
+def synthetic_corpus(n: int, *, seed: int = 0, start_ts: float = 1_735_689_600.0, span_days: float = 90.0,
+                     reply_rate: float = 0.15, pad_body_chars: int = 0) -> tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """
+    Deterministic corpus of n job-search emails.
+
+    Returns (messages, truth) where truth maps message_id -> expected JobLabel value.
+    reply_rate: share of recruiter/ATS mail that continues an earlier thread of the same company.
+    pad_body_chars: append neutral filler to every body (real mail is KBs, templates are one line).
+    """
+    rng = random.Random(seed)
+    weights = [t.weight for t in TEMPLATES]
+    threads_by_company: Dict[str, List[str]] = {}
+
+    messages: List[Dict[str, Any]] = []
+    truth: Dict[str, str] = {}
+    for i in range(n):
+        t = rng.choices(TEMPLATES, weights=weights)[0]
+        company = rng.choice(COMPANIES)
+        first = rng.choice(FIRST_NAMES)
+        fields = {
+            "company": company,
+            "company_l": company.lower(),
+            "role": rng.choice(ROLES),
+            "ats": rng.choice(ATS_DOMAINS),
+            "first": first,
+            "first_l": first.lower(),
+            "code": f"{rng.randrange(10**6):06d}",
+            "n": rng.randrange(20),
+        }
+        msg_id = f"m{i:07d}"
+        thread_id = f"t{i:07d}"
+        if t.label in ("APPLIED", "REJECTED", "INTERVIEWS", "ASSESSMENTS", "IN PROCESS"):
+            earlier = threads_by_company.setdefault(company, [])
+            if earlier and rng.random() < reply_rate:
+                thread_id = rng.choice(earlier)
+            else:
+                earlier.append(thread_id)
+
+        ts = start_ts + span_days * 86400 * i / max(1, n)
+        messages.append(make_message(
+            msg_id=msg_id,
+            thread_id=thread_id,
+            from_=t.from_.format(**fields),
+            subject=t.subject.format(**fields),
+            body=t.body.format(**fields) + _filler(pad_body_chars),
+            ts=ts,
+            label_ids=["INBOX", "UNREAD", *t.extra_labels],
+            html=rng.random() < 0.5,
+        ))
+        truth[msg_id] = t.label
+    return messages, truth
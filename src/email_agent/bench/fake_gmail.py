@@ -0,0 +1,412 @@
+from __future__ import annotations
+
+import base64
+import copy
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from email_agent.gmail.quota import QUOTA_UNITS
+from email_agent.gmail.service import FILTERS_SCOPE
+
+_SYSTEM_LABELS = ["INBOX", "UNREAD", "SENT", "CATEGORY_PROMOTIONS", "CATEGORY_UPDATES", "CATEGORY_SOCIAL"]
+
+
+class FakeHttpError(Exception):
+    def __init__(self, status: int, reason: str):
+        super().__init__(f"{status} {reason}")
+        self.status = status
+        self.reason = reason
+
+
+class _Request:
+    """Stands in for googleapiclient's HttpRequest: nothing happens until execute()."""
+
+    def __init__(self, gmail: "FakeGmailService", method: str, fn: Callable[[], Any]):
+        self._gmail = gmail
+        self.method = method
+        self._fn = fn
+
+    def execute(self, num_retries: int = 0):
+        self._gmail._count(self.method, http_call=True)
+        return self._fn()
+
+
+class _BatchRequest:
+    """Stands in for BatchHttpRequest: one HTTP round-trip, quota still counted per inner call."""
+
+    def __init__(self, gmail: "FakeGmailService", callback: Optional[Callable] = None):
+        self._gmail = gmail
+        self._callback = callback
+        self._items: list[tuple[str, _Request, Optional[Callable]]] = []
+
+    def add(self, request: _Request, callback: Optional[Callable] = None, request_id: Optional[str] = None):
+        self._items.append((request_id or str(len(self._items) + 1), request, callback))
+
+    def execute(self):
+        self._gmail._count("batch", http_call=True, units=False)
+        for request_id, req, cb in self._items:
+            self._gmail._count(req.method, http_call=False)
+            resp, exc = None, None
+            try:
+                resp = req._fn()
+            except FakeHttpError as e:
+                exc = e
+            cb = cb or self._callback
+            if cb:
+                cb(request_id, resp, exc)
+
+
+class _Resource:
+    def __init__(self, **methods: Callable):
+        for name, fn in methods.items():
+            setattr(self, name, fn)
+
+
+def _header(msg: Dict[str, Any], name: str) -> str:
+    for h in (msg.get("payload") or {}).get("headers", []) or []:
+        if h.get("name", "").lower() == name.lower():
+            return h.get("value", "")
+    return ""
+
+
+def _plain_text(payload: Dict[str, Any]) -> str:
+    """Decoded text/plain parts: Gmail's search covers the body, not just the snippet."""
+    if payload.get("mimeType") == "text/plain":
+        data = (payload.get("body") or {}).get("data", "")
+        return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4)).decode("utf-8", errors="replace")
+    return "\n".join(_plain_text(p) for p in payload.get("parts", []) or [])
+
+
+def _parse_date(token: str) -> float:
+    if token.isdigit():
+        return float(token)
+    return datetime.strptime(token, "%Y/%m/%d").replace(tzinfo=timezone.utc).timestamp()
+
+
+_Q_TOKEN_RE = re.compile(
+    r'(-?)(?:(\w+):(\{[^}]*\}|\([^)]*\)|"[^"]*"|\S+)|(\{[^}]*\}|\([^)]*\))|"([^"]*)"|(\S+))'
+)
+
+
+def _alternatives(value: str) -> list[str]:
+    """`{a b}` / `(a OR b)` -> [a, b]; `"a b"` -> [a b]."""
+    value = value.strip()
+    if value[:1] in "{(":
+        inner = value[1:-1]
+        parts = re.findall(r'"[^"]*"|\S+', inner)
+        return [p.strip('"').lower() for p in parts if p.upper() != "OR"]
+    return [value.strip('"').lower()]
+
+
+class FakeGmailService:
+    """
+    In-process stand-in for the googleapiclient Gmail v1 surface the agent uses:
+    messages.list/get(full|metadata|minimal)/modify/batchModify, threads.get,
+    labels.list/create, settings.filters.list/get/create/delete, getProfile and
+    new_batch_http_request. deliver() adds new mail, running the filters on it like Gmail does.
+    scopes: the token's OAuth scopes; filter create / delete fail with 403 without gmail.settings.basic.
+
+    Counts HTTP calls and quota units. latency_s adds a fixed sleep per HTTP round-trip.
+    Search `q` supports the subset of Gmail operators the agent generates.
+    """
+
+    def __init__(self, messages: Iterable[Dict[str, Any]], *, latency_s: float = 0.0, email: str = "me@example.com",
+                 scopes: Optional[Iterable[str]] = None):
+        self._lock = threading.Lock()
+        self.latency_s = latency_s
+        self.email = email
+        # OAuth scopes the token was granted (None: all of them)
+        self.scopes = None if scopes is None else set(scopes)
+        self.messages: Dict[str, Dict[str, Any]] = {}
+        for m in messages:
+            m = copy.deepcopy(m)
+            m.setdefault("labelIds", [])
+            self.messages[m["id"]] = m
+        # newest first, like Gmail
+        self._order = sorted(self.messages, key=lambda i: int(self.messages[i].get("internalDate", "0")), reverse=True)
+
+        self.labels: Dict[str, Dict[str, Any]] = {
+            name: {"id": name, "name": name, "type": "system"} for name in _SYSTEM_LABELS
+        }
+        self.filters: Dict[str, Dict[str, Any]] = {}
+        self.calls: Counter = Counter()
+        self.http_calls = 0
+        self.quota_units = 0
+
+    # ---- accounting ----
+
+    def _count(self, method: str, *, http_call: bool, units: bool = True) -> None:
+        with self._lock:
+            self.calls[method] += 1
+            if http_call:
+                self.http_calls += 1
+            if units:
+                self.quota_units += QUOTA_UNITS.get(method, 1)
+        if http_call and self.latency_s:
+            time.sleep(self.latency_s)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"http_calls": self.http_calls, "quota_units": self.quota_units, "by_method": dict(self.calls)}
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.calls.clear()
+            self.http_calls = 0
+            self.quota_units = 0
+
+    # ---- googleapiclient surface ----
+
+    def users(self):
+        return _Resource(
+            messages=lambda: _Resource(
+                list=self._messages_list,
+                get=self._messages_get,
+                modify=self._messages_modify,
+                batchModify=self._messages_batch_modify,
+            ),
+            threads=lambda: _Resource(get=self._threads_get),
+            labels=lambda: _Resource(list=self._labels_list, create=self._labels_create),
+            settings=lambda: _Resource(
+                filters=lambda: _Resource(
+                    list=self._filters_list,
+                    get=self._filters_get,
+                    create=self._filters_create,
+                    delete=self._filters_delete,
+                ),
+            ),
+            getProfile=self._get_profile,
+        )
+
+    def new_batch_http_request(self, callback: Optional[Callable] = None) -> _BatchRequest:
+        return _BatchRequest(self, callback)
+
+    # ---- messages ----
+
+    def _matches(self, msg: Dict[str, Any], q: str) -> bool:
+        label_ids = set(msg.get("labelIds", []))
+        label_by_name = {l["name"].lower(): l["id"] for l in self.labels.values()}
+        ts = int(msg.get("internalDate", "0")) / 1000
+        for neg, op, value, group, phrase, word in _Q_TOKEN_RE.findall(q):
+            if not op:
+                terms = _alternatives(group) if group else [(phrase or word).lower()]
+                text = f"{_header(msg, 'Subject')}\n{_plain_text(msg.get('payload') or {})}".lower()
+                hit = any(term in text for term in terms)
+            else:
+                op = op.lower()
+                alts = _alternatives(value)
+                if op == "label":
+                    hit = any(label_by_name.get(a, a.upper()) in label_ids for a in alts)
+                elif op == "category":
+                    hit = any(f"CATEGORY_{a.upper()}" in label_ids for a in alts)
+                elif op == "from":
+                    sender = _header(msg, "From").lower()
+                    hit = any(a in sender for a in alts)
+                elif op == "subject":
+                    subject = _header(msg, "Subject").lower()
+                    hit = any(a in subject for a in alts)
+                elif op == "after":
+                    hit = ts >= _parse_date(value)
+                elif op == "before":
+                    hit = ts < _parse_date(value)
+                elif op == "is" and value.lower() == "unread":
+                    hit = "UNREAD" in label_ids
+                else:
+                    hit = True  # unknown operator: don't filter
+            if bool(neg) == hit:
+                return False
+        return True
+
+    def _messages_list(self, userId: str = "me", maxResults: int = 100, pageToken: Optional[str] = None,
+                       q: Optional[str] = None, labelIds: Optional[List[str]] = None, **_):
+        def run():
+            ids = [i for i in self._order if not q or self._matches(self.messages[i], q)]
+            if labelIds:
+                ids = [i for i in ids if set(labelIds) <= set(self.messages[i]["labelIds"])]
+            start = int(pageToken or 0)
+            page = ids[start : start + min(maxResults, 500)]
+            resp: Dict[str, Any] = {
+                "messages": [{"id": i, "threadId": self.messages[i]["threadId"]} for i in page],
+                "resultSizeEstimate": len(ids),
+            }
+            if start + len(page) < len(ids):
+                resp["nextPageToken"] = str(start + len(page))
+            if not page:
+                resp.pop("messages")
+            return resp
+        return _Request(self, "messages.list", run)
+
+    def _render(self, msg: Dict[str, Any], fmt: str, metadata_headers: Optional[List[str]]) -> Dict[str, Any]:
+        out = {k: v for k, v in msg.items() if k != "payload"}
+        out["labelIds"] = list(msg["labelIds"])
+        if fmt == "minimal":
+            return out
+        if fmt == "metadata":
+            wanted = {h.lower() for h in (metadata_headers or [])}
+            headers = [
+                h for h in msg["payload"].get("headers", [])
+                if not wanted or h["name"].lower() in wanted
+            ]
+            out["payload"] = {"mimeType": msg["payload"].get("mimeType", ""), "headers": copy.deepcopy(headers)}
+            return out
+        out["payload"] = copy.deepcopy(msg["payload"])
+        return out
+
+    def _messages_get(self, userId: str = "me", id: str = "", format: str = "full",
+                      metadataHeaders: Optional[List[str]] = None, **_):
+        def run():
+            msg = self.messages.get(id)
+            if msg is None:
+                raise FakeHttpError(404, "Not Found")
+            return self._render(msg, format, metadataHeaders)
+        return _Request(self, "messages.get", run)
+
+    def _apply(self, msg_id: str, add: List[str], remove: List[str]) -> Dict[str, Any]:
+        msg = self.messages.get(msg_id)
+        if msg is None:
+            raise FakeHttpError(404, "Not Found")
+        for lid in add + remove:
+            if lid not in self.labels:
+                raise FakeHttpError(400, f"Invalid label: {lid}")
+        with self._lock:
+            labels = [l for l in msg["labelIds"] if l not in set(remove)]
+            labels += [l for l in add if l not in labels]
+            msg["labelIds"] = labels
+        return {"id": msg_id, "threadId": msg["threadId"], "labelIds": list(labels)}
+
+    def _messages_modify(self, userId: str = "me", id: str = "", body: Optional[Dict[str, Any]] = None, **_):
+        body = body or {}
+        return _Request(
+            self, "messages.modify",
+            lambda: self._apply(id, body.get("addLabelIds", []), body.get("removeLabelIds", [])),
+        )
+
+    def _messages_batch_modify(self, userId: str = "me", body: Optional[Dict[str, Any]] = None, **_):
+        body = body or {}
+
+        def run():
+            ids = body.get("ids", [])
+            if len(ids) > 1000:
+                raise FakeHttpError(400, "Too many ids (max 1000)")
+            for msg_id in ids:
+                self._apply(msg_id, body.get("addLabelIds", []), body.get("removeLabelIds", []))
+            return {}
+        return _Request(self, "messages.batchModify", run)
+
+    # ---- threads ----
+
+    def _threads_get(self, userId: str = "me", id: str = "", format: str = "full",
+                     metadataHeaders: Optional[List[str]] = None, **_):
+        def run():
+            msgs = [m for m in self.messages.values() if m["threadId"] == id]
+            if not msgs:
+                raise FakeHttpError(404, "Not Found")
+            msgs.sort(key=lambda m: int(m.get("internalDate", "0")))
+            return {"id": id, "messages": [self._render(m, format, metadataHeaders) for m in msgs]}
+        return _Request(self, "threads.get", run)
+
+    # ---- labels ----
+
+    def _labels_list(self, userId: str = "me", **_):
+        return _Request(self, "labels.list", lambda: {"labels": [dict(l) for l in self.labels.values()]})
+
+    def _labels_create(self, userId: str = "me", body: Optional[Dict[str, Any]] = None, **_):
+        def run():
+            name = (body or {})["name"]
+            if any(l["name"] == name for l in self.labels.values()):
+                raise FakeHttpError(409, "Label name exists or conflicts")
+            label = {"id": f"Label_{len(self.labels) + 1}", "name": name, "type": "user"}
+            self.labels[label["id"]] = label
+            return dict(label)
+        return _Request(self, "labels.create", run)
+
+    # ---- filters ----
+
+    def _require_scope(self, scope: str) -> None:
+        if self.scopes is not None and scope not in self.scopes:
+            raise FakeHttpError(403, "Request had insufficient authentication scopes.")
+
+    def _filters_list(self, userId: str = "me", **_):
+        # like Gmail: no "filter" key at all when there are none
+        return _Request(
+            self, "settings.filters.list",
+            lambda: {"filter": [copy.deepcopy(f) for f in self.filters.values()]} if self.filters else {},
+        )
+
+    def _filters_get(self, userId: str = "me", id: str = "", **_):
+        def run():
+            if id not in self.filters:
+                raise FakeHttpError(404, "Not Found")
+            return copy.deepcopy(self.filters[id])
+        return _Request(self, "settings.filters.get", run)
+
+    def _filters_create(self, userId: str = "me", body: Optional[Dict[str, Any]] = None, **_):
+        def run():
+            self._require_scope(FILTERS_SCOPE)
+            body_ = copy.deepcopy(body or {})
+            for lid in body_.get("action", {}).get("addLabelIds", []):
+                if lid not in self.labels:
+                    raise FakeHttpError(400, f"Invalid label: {lid}")
+            if any(f["criteria"] == body_.get("criteria") for f in self.filters.values()):
+                raise FakeHttpError(400, "Filter already exists")
+            with self._lock:
+                fid = f"ANe1Bm{len(self.filters) + 1:06d}"
+                self.filters[fid] = {"id": fid, **body_}
+            return copy.deepcopy(self.filters[fid])
+        return _Request(self, "settings.filters.create", run)
+
+    def _filters_delete(self, userId: str = "me", id: str = "", **_):
+        def run():
+            self._require_scope(FILTERS_SCOPE)
+            with self._lock:
+                if self.filters.pop(id, None) is None:
+                    raise FakeHttpError(404, "Not Found")
+            return ""
+        return _Request(self, "settings.filters.delete", run)
+
+    def _filter_matches(self, msg: Dict[str, Any], criteria: Dict[str, Any]) -> bool:
+        terms = []
+        if criteria.get("from"):
+            terms.append(f"from:{criteria['from']}")
+        if criteria.get("subject"):
+            terms.append(f"subject:{criteria['subject']}")
+        if criteria.get("query"):
+            terms.append(criteria["query"])
+        if not terms or not self._matches(msg, " ".join(terms)):
+            return False
+        return not (criteria.get("negatedQuery") and self._matches(msg, criteria["negatedQuery"]))
+
+    def deliver(self, messages: Iterable[Dict[str, Any]]) -> int:
+        """New mail arrives (not counted as API calls): filters run on it. Returns how many a filter labeled."""
+        filtered = 0
+        for m in messages:
+            m = copy.deepcopy(m)
+            m.setdefault("labelIds", [])
+            hit = False
+            for f in self.filters.values():
+                if self._filter_matches(m, f.get("criteria", {})):
+                    action = f.get("action", {})
+                    remove = set(action.get("removeLabelIds", []))
+                    m["labelIds"] = [l for l in m["labelIds"] if l not in remove]
+                    m["labelIds"] += [l for l in action.get("addLabelIds", []) if l not in m["labelIds"]]
+                    hit = True
+            filtered += hit
+            with self._lock:
+                self.messages[m["id"]] = m
+                self._order.insert(0, m["id"])
+        return filtered
+
+    # ---- profile ----
+
+    def _get_profile(self, userId: str = "me", **_):
+        return _Request(
+            self, "getProfile",
+            lambda: {
+                "emailAddress": self.email,
+                "messagesTotal": len(self.messages),
+                "threadsTotal": len({m["threadId"] for m in self.messages.values()}),
+            },
+        )
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+# What a reasonable model would answer for the synthetic corpus; first match wins.
+_HEURISTICS: List[Tuple[re.Pattern, str, str, bool]] = [
+    (re.compile(r"unfortunately|not to move forward|regret"), "REJECTED", "medium", False),
+    (re.compile(r"interview|availability"), "INTERVIEWS", "high", True),
+    (re.compile(r"assessment|hackerrank|coding challenge"), "ASSESSMENTS", "high", False),
+    (re.compile(r"verification code|passcode"), "OTP_SECURITY", "high", False),
+    (re.compile(r"received your application|thank you for applying"), "APPLIED", "low", False),
+    (re.compile(r"recruiter|your profile|hiring manager|great fit"), "IN PROCESS", "medium", True),
+    (re.compile(r"job alert|jobs you may like"), "JOB_ALERTS", "low", False),
+    (re.compile(r"unsubscribe|% off|sale"), "ADVERTISEMENTS", "low", False),
+]
+
+
+def fake_analysis(user_prompt: str) -> Dict[str, Any]:
+    text = user_prompt.lower()
+    for pattern, label, urgency, needs_reply in _HEURISTICS:
+        if pattern.search(text):
+            return {"label": label, "urgency": urgency, "needs_reply": needs_reply,
+                    "reasoning_brief": f"Looks like {label}."}
+    return {"label": "OTHERS", "urgency": "low", "needs_reply": False, "reasoning_brief": "Not job related."}
+
+
+class FakeOllamaServer:
+    """
+    Local HTTP server speaking enough of Ollama's /api/chat to drive OllamaClient.
+
+    latency_s (+ uniform jitter_s) is slept per request; error_rate returns HTTP 500,
+    invalid_json_rate returns non-JSON content (exercises the analyzer's retry path).
+    Response carries Ollama's timing fields (nanoseconds) so instrumentation sees real shapes.
+    "stream": true is answered as NDJSON chunks paced over the generation time (a fifth for
+    prompt eval, the rest spread over ~4-char tokens); a client that disconnects mid-stream
+    stops the "generation", like Ollama does (counted in `cancelled`).
+    """
+
+    def __init__(
+        self,
+        *,
+        latency_s: float = 0.05,
+        jitter_s: float = 0.0,
+        error_rate: float = 0.0,
+        invalid_json_rate: float = 0.0,
+        load_s: float = 0.0,
+        seed: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+        self.error_rate = error_rate
+        self.invalid_json_rate = invalid_json_rate
+        self.load_s = load_s                   # one-off "model load" on the first request
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.requests = 0
+        self.errors = 0
+        self.cancelled = 0
+        self.tokens_generated = 0
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # headers and body go out in separate writes: without this, Nagle + delayed ACK
+            # add ~40ms to every keep-alive request and swamp the configured latency
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):  # keep benchmark output clean
+                pass
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self._send(200, {"models": [{"name": "fake"}]})
+                else:
+                    self._send(404, {"error": "not found"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", "0"))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if self.path != "/api/chat":
+                    self._send(404, {"error": "not found"})
+                    return
+                if body.get("stream"):
+                    server._chat_stream(self, body)
+                    return
+                status, resp, delay = server._chat(body)
+                time.sleep(delay)
+                self._send(status, resp)
+
+            def _send(self, status: int, obj: Dict[str, Any]):
+                data = json.dumps(obj).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _chunk(self, obj: Dict[str, Any]):
+                data = json.dumps(obj).encode("utf-8") + b"\n"
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOllamaServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _chat(self, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any], float]:
+        """(status, response, seconds the model would take) for one non-streaming request."""
+        with self._lock:
+            self.requests += 1
+            roll = self._rng.random()
+            jitter = self._rng.uniform(0, self.jitter_s) if self.jitter_s else 0.0
+            load = 0.0 if self._loaded else self.load_s
+            self._loaded = True
+
+        gen_s = self.latency_s + jitter
+
+        if roll < self.error_rate:
+            with self._lock:
+                self.errors += 1
+            return 500, {"error": "injected failure"}, load + gen_s
+
+        user = next((m["content"] for m in reversed(body.get("messages", [])) if m.get("role") == "user"), "")
+        if roll < self.error_rate + self.invalid_json_rate:
+            content = "Sure! Here is the classification you asked for."
+        else:
+            content = json.dumps(fake_analysis(user))
+
+        ns = 1_000_000_000
+        return 200, {
+            "model": body.get("model", "fake"),
+            "message": {"role": "assistant", "content": content},
+            "done": True,
+            "total_duration": int((load + gen_s) * ns),
+            "load_duration": int(load * ns),
+            "prompt_eval_count": len(user) // 4,
+            "prompt_eval_duration": int(gen_s * 0.2 * ns),
+            "eval_count": len(content) // 4,
+            "eval_duration": int(gen_s * 0.8 * ns),
+        }, load + gen_s
+
+    def _chat_stream(self, handler, body: Dict[str, Any]) -> None:
+        status, resp, _ = self._chat(body)
+        if status != 200:
+            time.sleep(self.latency_s)
+            handler._send(status, resp)
+            return
+
+        ns = 1_000_000_000
+        load = resp["load_duration"] / ns
+        content = resp["message"]["content"]
+        tokens = [content[i : i + 4] for i in range(0, len(content), 4)] or [""]
+        per_token = resp["eval_duration"] / ns / len(tokens)
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/x-ndjson")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+
+        time.sleep(load + resp["prompt_eval_duration"] / ns)
+        try:
+            for tok in tokens:
+                time.sleep(per_token)
+                with self._lock:
+                    self.tokens_generated += 1
+                handler._chunk({"model": resp["model"], "message": {"role": "assistant", "content": tok}, "done": False})
+            final = {k: v for k, v in resp.items() if k != "message"}
+            final["message"] = {"role": "assistant", "content": ""}
+            handler._chunk(final)
+            handler.wfile.write(b"0\r\n\r\n")
+            handler.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            with self._lock:
+                self.cancelled += 1
+            handler.close_connection = True
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import os
+import platform
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass, asdict
+from typing import Any, Dict
+
+from email_agent.bench.corpus import synthetic_corpus
+from email_agent.bench.fake_gmail import FakeGmailService
+from email_agent.bench.fake_ollama import FakeOllamaServer
+from email_agent.llm.ollama_client import OllamaClient
+from email_agent.metrics import metrics
+from email_agent.pipeline.pushdown import PUSHDOWN_RULES
+from email_agent.pipeline.reputation import SenderReputation
+from email_agent.pipeline.runner import LabelPipeline
+from email_agent.schemas import JobLabel
+from email_agent.state.store import StateStore
+
+
+@dataclass
+class BenchConfig:
+    emails: int = 500
+    seed: int = 0
+    thread_mode: bool = False
+    reputation: bool = True
+    llm_workers: int = 1                  # 0: LLM called inline, in listing order
+    pushdown: bool = True                 # Gmail-search pre-pass (all PUSHDOWN_RULES)
+    gmail_latency_s: float = 0.0          # per Gmail HTTP round-trip
+    llm_latency_s: float = 0.05
+    llm_jitter_s: float = 0.0
+    llm_load_s: float = 0.0
+    llm_error_rate: float = 0.0
+    llm_invalid_json_rate: float = 0.0
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    s = sorted(values)
+    k = (len(s) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(s) - 1)
+    return s[lo] + (s[hi] - s[lo]) * (k - lo)
+
+
+def run_benchmark(cfg: BenchConfig) -> Dict[str, Any]:
+    """
+    Run the real pipeline end-to-end against FakeGmailService + FakeOllamaServer.
+    Returns a JSON-serialisable report.
+    """
+    messages, truth = synthetic_corpus(cfg.emails, seed=cfg.seed)
+    service = FakeGmailService(messages, latency_s=cfg.gmail_latency_s)
+
+    with tempfile.TemporaryDirectory() as tmp, FakeOllamaServer(
+        latency_s=cfg.llm_latency_s,
+        jitter_s=cfg.llm_jitter_s,
+        load_s=cfg.llm_load_s,
+        error_rate=cfg.llm_error_rate,
+        invalid_json_rate=cfg.llm_invalid_json_rate,
+        seed=cfg.seed,
+    ) as llm:
+        store = StateStore(os.path.join(tmp, "bench.db"))
+        pipeline = LabelPipeline(
+            service,
+            store=store,
+            client=OllamaClient(base_url=llm.url, model="fake"),
+            reputation=SenderReputation(store) if cfg.reputation else None,
+            log=lambda _msg: None,
+            llm_workers=cfg.llm_workers,
+            pushdown_rules=list(PUSHDOWN_RULES) if cfg.pushdown else [],
+        )
+        setup = service.stats()
+        service.reset_stats()
+        metrics.reset()
+
+        t0 = time.perf_counter()
+        summary = pipeline.run(max_emails=cfg.emails, thread_mode=cfg.thread_mode, detailed=True)
+        elapsed = time.perf_counter() - t0
+
+        sources = Counter(
+            r[0] for r in store.conn.execute("SELECT source FROM messages WHERE label != ''")
+        )
+        store.close()
+        llm_calls, llm_errors = llm.requests, llm.errors
+
+    gmail = service.stats()
+    n = max(1, summary.checked)
+    correct = sum(1 for mid, label in summary.decisions.items() if truth.get(mid) == label)
+    urgent = [s for mid, s in summary.label_times_s.items()
+              if truth.get(mid) in (JobLabel.INTERVIEWS.value, JobLabel.ASSESSMENTS.value)]
+    everything = list(summary.label_times_s.values())
+
+    return {
+        "config": asdict(cfg),
+        "env": {"python": platform.python_version(), "platform": platform.platform()},
+        "emails": summary.checked,
+        "labeled": summary.labeled,
+        "skipped": summary.skipped,
+        "errors": summary.errors,
+        "elapsed_s": round(elapsed, 4),
+        "emails_per_sec": round(summary.checked / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(summary.latencies_ms, 50), 3),
+            "p99": round(percentile(summary.latencies_ms, 99), 3),
+            "max": round(max(summary.latencies_ms, default=0.0), 3),
+        },
+        "time_to_label_s": {
+            # seconds from batch start until the message's labels were written
+            "urgent_p50": round(percentile(urgent, 50), 3),
+            "urgent_p95": round(percentile(urgent, 95), 3),
+            "all_p50": round(percentile(everything, 50), 3),
+            "all_p95": round(percentile(everything, 95), 3),
+        },
+        "gmail": {
+            "calls": gmail["http_calls"],
+            "quota_units": gmail["quota_units"],
+            "calls_per_email": round(gmail["http_calls"] / n, 3),
+            "quota_units_per_email": round(gmail["quota_units"] / n, 3),
+            "by_method": gmail["by_method"],
+            "setup_calls": setup["http_calls"],
+        },
+        "llm": {
+            "calls": llm_calls,
+            "errors": llm_errors,
+            "calls_per_email": round(llm_calls / n, 3),
+        },
+        "decided_by": dict(sources),
+        "accuracy": round(correct / max(1, len(summary.decisions)), 4),
+        "stages": metrics.summary() if metrics.enabled else None,
+    }
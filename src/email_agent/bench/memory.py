@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import gc
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict
+
+from email_agent.bench.corpus import synthetic_corpus
+from email_agent.bench.fake_gmail import FakeGmailService
+from email_agent.bench.fake_ollama import fake_analysis
+from email_agent.gmail.fetch import _decode_base64url, _get_header, fetch_recent_emails
+from email_agent.pipeline.pushdown import PUSHDOWN_RULES
+from email_agent.pipeline.reputation import SenderReputation
+from email_agent.pipeline.runner import LabelPipeline
+from email_agent.state.store import StateStore
+
+
+@dataclass
+class _LegacyEmail:
+    """Record shape before compact records: dataclass dict, eagerly decoded body, raw response kept."""
+    message_id: str
+    thread_id: str
+    from_email: str
+    subject: str
+    date: str
+    snippet: str
+    body_text: str
+    label_ids: list[str]
+    full: Dict[str, Any]
+
+
+def _legacy_fetch_all(service, n: int) -> list[_LegacyEmail]:
+    # list every ID, then get + decode every message into one list before processing starts
+    out = []
+    ids: list[str] = []
+    token = None
+    while len(ids) < n:
+        resp = service.users().messages().list(userId="me", maxResults=min(500, n - len(ids)), pageToken=token).execute()
+        ids += [m["id"] for m in resp.get("messages", [])]
+        token = resp.get("nextPageToken")
+        if not token:
+            break
+    for msg_id in ids:
+        full = service.users().messages().get(userId="me", id=msg_id, format="full").execute()
+        payload = full.get("payload", {}) or {}
+        headers = payload.get("headers", []) or []
+        parts = payload.get("parts", []) or [payload]
+        body = next((_decode_base64url(p["body"].get("data", "")) for p in parts if p.get("mimeType") == "text/plain"), "")
+        out.append(_LegacyEmail(
+            message_id=full["id"], thread_id=full["threadId"],
+            from_email=_get_header(headers, "From"), subject=_get_header(headers, "Subject"),
+            date=_get_header(headers, "Date"), snippet=full.get("snippet", ""),
+            body_text=body.strip(), label_ids=full.get("labelIds", []), full=full,
+        ))
+    return out
+
+
+class _WireGmail(FakeGmailService):
+    """Responses are JSON round-tripped, like real HTTP: fresh strings, nothing shared with the fake's storage."""
+
+    def _render(self, msg, fmt, metadata_headers):
+        return json.loads(json.dumps(super()._render(msg, fmt, metadata_headers)))
+
+
+class _InlineLLM:
+    """FakeOllamaServer's answers without the HTTP server, whose thread would be traced too."""
+    model = "fake"
+
+    def chat(self, system: str, user: str, temperature: float = 0.2, num_predict: int = 220,
+             timeout_s: float = 180.0) -> str:
+        return json.dumps(fake_analysis(user))
+
+
+def _consume(e, i: int, body_every: int) -> int:
+    # what the pipeline touches: headers + snippet always, the body for the share that needs it
+    size = len(e.subject) + len(e.snippet) + len(e.from_email)
+    if body_every and i % body_every == 0:
+        size += len(e.body_text)
+    return size
+
+
+def _measure(fn: Callable[[], Any]) -> Dict[str, float]:
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"peak_mb": round(peak / 2**20, 2), "elapsed_s": round(elapsed, 3)}
+
+
+def run_memory_benchmark(n: int = 10_000, *, seed: int = 0, body_chars: int = 4000, body_share: float = 0.2) -> Dict[str, Any]:
+    """
+    Peak traced memory of fetching n messages (fake Gmail, format=full) three ways:
+      legacy  - pre-change records in one list (raw response + decoded body per message)
+      list    - compact records in one list (list(fetch_recent_emails(...)))
+      stream  - compact records consumed one at a time from the generator
+    The fake's own storage is allocated before tracing starts and not counted.
+    body_share: fraction of messages whose body is read (rules that need the body / LLM).
+    """
+    messages, _ = synthetic_corpus(n, seed=seed, pad_body_chars=body_chars)
+    service = _WireGmail(messages)
+    del messages
+    body_every = round(1 / body_share) if body_share > 0 else 0
+
+    def legacy():
+        emails = _legacy_fetch_all(service, n)
+        return sum(_consume(e, i, body_every) for i, e in enumerate(emails))
+
+    def as_list():
+        emails = list(fetch_recent_emails(service, max_results=n))
+        return sum(_consume(e, i, body_every) for i, e in enumerate(emails))
+
+    def stream():
+        return sum(_consume(e, i, body_every) for i, e in enumerate(fetch_recent_emails(service, max_results=n)))
+
+    report: Dict[str, Any] = {"messages": n, "body_chars": body_chars, "body_share": body_share}
+    for name, fn in (("legacy", legacy), ("list", as_list), ("stream", stream)):
+        r = _measure(fn)
+        r["bytes_per_message"] = round(r["peak_mb"] * 2**20 / n)
+        report[name] = r
+    return report
+
+
+def run_pipeline_memory_benchmark(n: int = 10_000, *, seed: int = 0, body_chars: int = 4000) -> Dict[str, Any]:
+    """
+    Peak traced memory of a whole LabelPipeline.run over n messages (fake Gmail, inline fake LLM,
+    state store on disk), as the agent runs it and with per-message details kept (benchmarks).
+    Pipeline setup (labels, store, reputation tables) and a short warm-up run (lazy imports,
+    compiled patterns) happen before tracing starts.
+    """
+    messages, _ = synthetic_corpus(n, seed=seed, pad_body_chars=body_chars)
+    report: Dict[str, Any] = {"messages": n, "body_chars": body_chars}
+    for name, detailed in (("warmup", False), ("run", False), ("run_detailed", True)):
+        service = _WireGmail(messages)
+        with tempfile.TemporaryDirectory() as tmp:
+            store = StateStore(os.path.join(tmp, "memory.db"))
+            pipeline = LabelPipeline(service, store=store, client=_InlineLLM(), reputation=SenderReputation(store),
+                                     log=lambda _msg: None, llm_workers=0, pushdown_rules=list(PUSHDOWN_RULES))
+            if name == "warmup":
+                pipeline.run(max_emails=min(n, 200))
+                store.close()
+                continue
+            r = _measure(lambda: pipeline.run(max_emails=n, detailed=detailed))
+            store.close()
+        r["bytes_per_message"] = round(r["peak_mb"] * 2**20 / n)
+        report[name] = r
+    return report
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+from contextlib import nullcontext
+from typing import Any, Dict, Optional
+
+from email_agent.bench.capture import read_corpus, strip_user_labels
+from email_agent.bench.fake_gmail import FakeGmailService
+from email_agent.bench.fake_ollama import FakeOllamaServer
+from email_agent.bench.harness import percentile
+from email_agent.config import settings
+from email_agent.gmail.fetch import _get_header
+from email_agent.llm.ollama_client import OllamaClient
+from email_agent.metrics import metrics
+from email_agent.pipeline.reputation import SenderReputation
+from email_agent.pipeline.runner import LabelPipeline, RunSummary
+from email_agent.state.store import StateStore
+
+
+def diff_decisions(
+    baseline: Dict[str, str],
+    current: Dict[str, str],
+    info: Dict[str, Dict[str, str]],
+) -> Dict[str, Any]:
+    """Label changes between two replays of the same corpus."""
+    changed = [
+        {
+            "message_id": mid,
+            "from": info.get(mid, {}).get("from", ""),
+            "subject": info.get(mid, {}).get("subject", ""),
+            "before": baseline[mid],
+            "after": label,
+        }
+        for mid, label in current.items()
+        if mid in baseline and baseline[mid] != label
+    ]
+    transitions: Dict[str, int] = {}
+    for c in changed:
+        key = f"{c['before']} -> {c['after']}"
+        transitions[key] = transitions.get(key, 0) + 1
+    return {
+        "compared": sum(1 for mid in current if mid in baseline),
+        "changed": len(changed),
+        "only_in_baseline": sum(1 for mid in baseline if mid not in current),
+        "only_in_current": sum(1 for mid in current if mid not in baseline),
+        "transitions": dict(sorted(transitions.items(), key=lambda kv: -kv[1])),
+        "changes": changed,
+    }
+
+
+def replay_corpus(
+    corpus_path: str,
+    *,
+    llm: str = "fake",                      # "fake" | "real"
+    llm_latency_s: float = 0.0,
+    thread_mode: bool = False,
+    reputation: bool = False,
+    baseline: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    """
+    Drive the full pipeline from a captured corpus: no Gmail calls, fresh temporary state.
+
+    Reputation is off by default so rule/prompt changes aren't masked by what the
+    index learned earlier in the same replay.
+    """
+    messages = [strip_user_labels(m) for m in read_corpus(corpus_path)]
+    info = {
+        m["id"]: {
+            "from": _get_header((m.get("payload") or {}).get("headers", []), "From"),
+            "subject": _get_header((m.get("payload") or {}).get("headers", []), "Subject"),
+        }
+        for m in messages
+    }
+    service = FakeGmailService(messages)
+    # replay in the captured (newest-first) order, without a list call
+    refs = [(m["id"], m.get("threadId", "")) for m in messages]
+    del messages
+
+    server = FakeOllamaServer(latency_s=llm_latency_s) if llm == "fake" else nullcontext()
+    with tempfile.TemporaryDirectory() as tmp, server as fake:
+        if llm == "fake":
+            client = OllamaClient(base_url=fake.url, model="fake")
+        else:
+            client = OllamaClient(base_url=settings.ollama_base_url, model=settings.ollama_model)
+
+        store = StateStore(os.path.join(tmp, "replay.db"))
+        pipeline = LabelPipeline(
+            service,
+            store=store,
+            client=client,
+            reputation=SenderReputation(store) if reputation else None,
+            log=lambda _msg: None,
+        )
+        metrics.reset()
+
+        t0 = time.perf_counter()
+        summary = pipeline.process(refs, thread_mode=thread_mode, summary=RunSummary(detailed=True))
+        elapsed = time.perf_counter() - t0
+        store.close()
+
+    report: Dict[str, Any] = {
+        "corpus": corpus_path,
+        "llm": llm if llm == "fake" else f"{settings.ollama_model}@{settings.ollama_base_url}",
+        "thread_mode": thread_mode,
+        "reputation": reputation,
+        "emails": summary.checked,
+        "labeled": summary.labeled,
+        "errors": summary.errors,
+        "elapsed_s": round(elapsed, 4),
+        "emails_per_sec": round(summary.checked / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(summary.latencies_ms, 50), 3),
+            "p99": round(percentile(summary.latencies_ms, 99), 3),
+        },
+        "llm_calls": int(sum(
+            v["count"] for k, v in metrics.summary()["spans"].items() if k.startswith("llm_request")
+        )) if metrics.enabled else None,
+        "decisions": summary.decisions,
+    }
+    if baseline is not None:
+        report["diff"] = diff_decisions(baseline, summary.decisions, info)
+    return report
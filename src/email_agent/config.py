@@ -1,13 +1,15 @@
 from __future__ import annotations
 
-from pydantic import BaseModel
+from dataclasses import dataclass
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 
 
-class Settings(BaseModel):
+# plain dataclass: every entry point imports this, pydantic isn't needed to read env vars
+@dataclass(frozen=True)
+class Settings:
     # Where local OAuth artifacts live (do not commit these)
     gmail_client_secret_path: str = os.getenv("GMAIL_CLIENT_SECRET_PATH", "secrets/gmail_oauth_client.json")
     gmail_token_path: str = os.getenv("GMAIL_TOKEN_PATH", "secrets/gmail_token.json")
@@ -1,20 +1,58 @@
 from __future__ import annotations
 
 import base64
-from dataclasses import dataclass
-from typing import Optional, List, Dict, Any
+from typing import Any, Dict, Iterator, List, Optional
+
+from email_agent.metrics import metrics
 
 
-@dataclass
 class SimpleEmail:
-    message_id: str
-    thread_id: str
-    from_email: str
-    subject: str
-    date: str
-    snippet: str
-    body_text: str
-    label_ids: list[str]
+    """
+    One message as the pipeline sees it: the fields it reads and nothing else.
+
+    __slots__ and no raw Gmail payload; the body is kept as the base64url data of the part
+    that would be shown (usually a few KB) and decoded on first access to body_text, so
+    records that are decided on headers/snippet never pay for it.
+    """
+
+    __slots__ = (
+        "message_id", "thread_id", "from_email", "subject", "date", "snippet",
+        "label_ids", "_body_data", "_body_text",
+    )
+
+    def __init__(
+        self,
+        message_id: str,
+        thread_id: str,
+        from_email: str,
+        subject: str,
+        date: str,
+        snippet: str,
+        body_text: Optional[str] = None,
+        label_ids: Optional[list[str]] = None,
+        *,
+        body_data: Optional[str] = None,
+    ):
+        self.message_id = message_id
+        self.thread_id = thread_id
+        self.from_email = from_email
+        self.subject = subject
+        self.date = date
+        self.snippet = snippet
+        self.label_ids = label_ids if label_ids is not None else []
+        self._body_text = body_text
+        self._body_data = body_data
+
+    @property
+    def body_text(self) -> str:
+        if self._body_text is None:
+            with metrics.span("mime_extract"):
+                self._body_text = _decode_base64url(self._body_data or "").strip()
+            self._body_data = None
+        return self._body_text
+
+    def __repr__(self) -> str:
+        return f"SimpleEmail(message_id={self.message_id!r}, subject={self.subject!r}, from_email={self.from_email!r})"
 
 
 def _get_header(headers: List[Dict[str, str]], name: str) -> str:
@@ -35,62 +73,142 @@ def _decode_base64url(data: str) -> str:
     return base64.urlsafe_b64decode(data.encode("utf-8")).decode("utf-8", errors="replace")
 
 
-def _extract_text_from_payload(payload: Dict[str, Any]) -> str:
+def _has_text(data: str, chunk: int = 4096) -> bool:
+    """True if the base64url data decodes to more than whitespace (decodes only as far as needed)."""
+    for i in range(0, len(data), chunk):     # chunk is a multiple of 4: each piece decodes alone
+        if _decode_base64url(data[i:i + chunk]).strip():
+            return True
+    return False
+
+
+def _body_data(payload: Dict[str, Any]) -> str:
     """
-    Prefer text/plain. If multipart, walk parts recursively.
+    base64url data of the part to show as the body, decoded no further than needed.
+    Prefer text/plain; if multipart, walk parts recursively, skipping parts with no
+    text (a whitespace-only text/plain must not win over the HTML); else whatever
+    data the top level has.
     """
     mime_type = payload.get("mimeType", "")
     body = payload.get("body", {}) or {}
     data = body.get("data")
 
     if mime_type == "text/plain" and data:
-        return _decode_base64url(data)
+        return data
 
     # multipart: recurse into parts
     parts = payload.get("parts", []) or []
     for part in parts:
-        text = _extract_text_from_payload(part)
-        if text.strip():
-            return text
+        found = _body_data(part)
+        if found and _has_text(found):
+            return found
 
     # fallback: if top-level has data even when not text/plain
-    if data:
-        return _decode_base64url(data)
+    return data or ""
 
-    return ""
 
-
-def fetch_recent_emails(service, max_results: int = 5) -> list[SimpleEmail]:
+def list_message_page(
+    service,
+    *,
+    page_size: int = 500,
+    q: Optional[str] = None,
+    page_token: Optional[str] = None,
+) -> tuple[list[tuple[str, str]], Optional[str]]:
     """
-    Fetch recent messages and return a clean, minimal representation.
+    One messages.list call: ([(message_id, thread_id)], next_page_token).
+    IDs only, so callers can drop known messages (or group by thread) before any get.
     """
-    resp = service.users().messages().list(userId="me", maxResults=max_results).execute()
-    messages = resp.get("messages", []) or []
-
-    results: list[SimpleEmail] = []
-    for m in messages:
-        msg_id = m["id"]
+    kwargs: Dict[str, Any] = {"userId": "me", "maxResults": page_size}
+    if q:
+        kwargs["q"] = q
+    if page_token:
+        kwargs["pageToken"] = page_token
+    with metrics.span("gmail_request", method="messages.list"):
+        resp = service.users().messages().list(**kwargs).execute()
+    refs = [(m["id"], m.get("threadId", "")) for m in resp.get("messages", []) or []]
+    return refs, resp.get("nextPageToken")
+
+
+def list_message_refs(service, max_results: int = 5, q: Optional[str] = None) -> list[tuple[str, str]]:
+    """Cheap: one list call, (message_id, thread_id) only."""
+    return list_message_page(service, page_size=max_results, q=q)[0]
+
+
+def iter_message_refs(
+    service,
+    q: Optional[str] = None,
+    *,
+    page_size: int = 500,
+    limit: Optional[int] = None,
+    page_token: Optional[str] = None,
+):
+    """
+    Page through messages.list, yielding (message_id, thread_id).
+    Only one page of refs is held at a time.
+    """
+    yielded = 0
+    while True:
+        refs, page_token = list_message_page(service, page_size=page_size, q=q, page_token=page_token)
+        for ref in refs:
+            yield ref
+            yielded += 1
+            if limit is not None and yielded >= limit:
+                return
+        if not page_token:
+            return
+
+
+def list_message_ids(service, max_results: int = 5, q: Optional[str] = None) -> list[str]:
+    return [msg_id for msg_id, _ in list_message_refs(service, max_results, q)]
+
+
+def _email_from_full(full: Dict[str, Any]) -> SimpleEmail:
+    payload = full.get("payload", {}) or {}
+    headers = payload.get("headers", []) or []
+
+    return SimpleEmail(
+        message_id=full.get("id", ""),
+        thread_id=full.get("threadId", ""),
+        from_email=_get_header(headers, "From"),
+        subject=_get_header(headers, "Subject"),
+        date=_get_header(headers, "Date"),
+        snippet=full.get("snippet", "") or "",
+        label_ids=full.get("labelIds", []) or [],
+        body_data=_body_data(payload),
+    )
+
+
+def fetch_email(service, msg_id: str) -> SimpleEmail:
+    with metrics.span("gmail_request", method="messages.get", format="full"):
         full = (
             service.users()
             .messages()
             .get(userId="me", id=msg_id, format="full")
             .execute()
         )
+    return _email_from_full(full)
+
 
-        payload = full.get("payload", {}) or {}
-        headers = payload.get("headers", []) or []
-
-        results.append(
-            SimpleEmail(
-                message_id=full.get("id", ""),
-                thread_id=full.get("threadId", ""),
-                from_email=_get_header(headers, "From"),
-                subject=_get_header(headers, "Subject"),
-                date=_get_header(headers, "Date"),
-                snippet=full.get("snippet", "") or "",
-                body_text=_extract_text_from_payload(payload).strip(),
-                label_ids=full.get("labelIds", []) or [],
-            )
+def fetch_thread(service, thread_id: str) -> list[SimpleEmail]:
+    """
+    One threads.get call for the whole conversation, oldest message first.
+    """
+    with metrics.span("gmail_request", method="threads.get", format="full"):
+        thread = (
+            service.users()
+            .threads()
+            .get(userId="me", id=thread_id, format="full")
+            .execute()
         )
+    messages = thread.get("messages", []) or []
+    messages.sort(key=lambda m: int(m.get("internalDate", "0") or 0))
+    return [_email_from_full(m) for m in messages]
+
 
-    return results
+def fetch_recent_emails(service, max_results: int = 5, q: Optional[str] = None) -> Iterator[SimpleEmail]:
+    """
+    Yield recent messages in a clean, minimal representation, one at a time:
+    pages through list (500 IDs per call) and gets each message as it is consumed,
+    so memory stays flat however large max_results is.
+    """
+    for msg_id, _ in iter_message_refs(service, q, page_size=max(1, min(max_results, 500)), limit=max_results):
+        yield fetch_email(service, msg_id)
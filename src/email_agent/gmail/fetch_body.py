@@ -3,6 +3,8 @@ from __future__ import annotations
 import base64
 from typing import Any, Dict, List
 
+from email_agent.metrics import metrics
+
 
 def _decode_base64url(data: str) -> str:
     if not data:
@@ -37,11 +39,13 @@ def fetch_email_body_text(service, message_id: str) -> str:
     """
     Slower: fetch full message and extract text/plain if possible.
     """
-    full = (
-        service.users()
-        .messages()
-        .get(userId="me", id=message_id, format="full")
-        .execute()
-    )
+    with metrics.span("gmail_request", method="messages.get", format="full"):
+        full = (
+            service.users()
+            .messages()
+            .get(userId="me", id=message_id, format="full")
+            .execute()
+        )
     payload = full.get("payload", {}) or {}
-    return _extract_text_from_payload(payload).strip()
+    with metrics.span("mime_extract"):
+        return _extract_text_from_payload(payload).strip()
@@ -1,11 +1,17 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, List
+from typing import Dict, Iterator, List
+
+from email_agent.gmail.fetch import iter_message_refs
+from email_agent.metrics import metrics
 
 
 @dataclass
 class EmailMeta:
+    # slots + only the parsed fields: the raw metadata response isn't kept alive per message
+    __slots__ = ("message_id", "thread_id", "from_email", "subject", "date", "snippet", "label_ids")
+
     message_id: str
     thread_id: str
     from_email: str
@@ -13,7 +19,6 @@ class EmailMeta:
     date: str
     snippet: str
     label_ids: list[str]
-    full: Dict[str, Any]
 
 
 def _get_header(headers: List[Dict[str, str]], name: str) -> str:
@@ -24,16 +29,8 @@ def _get_header(headers: List[Dict[str, str]], name: str) -> str:
     return ""
 
 
-def fetch_recent_email_meta(service, max_results: int = 10) -> list[EmailMeta]:
-    """
-    Fast: list IDs -> get METADATA only (no body).
-    """
-    resp = service.users().messages().list(userId="me", maxResults=max_results).execute()
-    messages = resp.get("messages", []) or []
-
-    out: list[EmailMeta] = []
-    for m in messages:
-        msg_id = m["id"]
+def fetch_email_meta(service, msg_id: str) -> EmailMeta:
+    with metrics.span("gmail_request", method="messages.get", format="metadata"):
         full = (
             service.users()
             .messages()
@@ -46,20 +43,23 @@ def fetch_recent_email_meta(service, max_results: int = 10) -> list[EmailMeta]:
             .execute()
         )
 
-        payload = full.get("payload", {}) or {}
-        headers = payload.get("headers", []) or []
+    payload = full.get("payload", {}) or {}
+    headers = payload.get("headers", []) or []
+
+    return EmailMeta(
+        message_id=full.get("id", ""),
+        thread_id=full.get("threadId", ""),
+        from_email=_get_header(headers, "From"),
+        subject=_get_header(headers, "Subject"),
+        date=_get_header(headers, "Date"),
+        snippet=full.get("snippet", "") or "",
+        label_ids=full.get("labelIds", []) or [],
+    )
 
-        out.append(
-            EmailMeta(
-                message_id=full.get("id", ""),
-                thread_id=full.get("threadId", ""),
-                from_email=_get_header(headers, "From"),
-                subject=_get_header(headers, "Subject"),
-                date=_get_header(headers, "Date"),
-                snippet=full.get("snippet", "") or "",
-                label_ids=full.get("labelIds", []) or [],
-                full=full,
-            )
-        )
 
-    return out
+def fetch_recent_email_meta(service, max_results: int = 10) -> Iterator[EmailMeta]:
+    """
+    Fast: list IDs (paged) -> get METADATA only (no body), yielded one message at a time.
+    """
+    for msg_id, _ in iter_message_refs(service, page_size=max(1, min(max_results, 500)), limit=max_results):
+        yield fetch_email_meta(service, msg_id)
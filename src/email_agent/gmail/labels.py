@@ -2,10 +2,13 @@ from __future__ import annotations
 
 from typing import Dict, Optional
 
+from email_agent.metrics import metrics
+
 
 def list_labels(service) -> Dict[str, str]:
     """Return mapping: label_name -> label_id"""
-    resp = service.users().labels().list(userId="me").execute()
+    with metrics.span("gmail_request", method="labels.list"):
+        resp = service.users().labels().list(userId="me").execute()
     labels = resp.get("labels", [])
     return {l["name"]: l["id"] for l in labels}
 
@@ -21,18 +24,43 @@ def ensure_label(service, name: str) -> str:
         "labelListVisibility": "labelShow",
         "messageListVisibility": "show",
     }
-    created = service.users().labels().create(userId="me", body=body).execute()
+    with metrics.span("gmail_request", method="labels.create"):
+        created = service.users().labels().create(userId="me", body=body).execute()
     return created["id"]
 
 
 def ensure_labels(service, names: list[str]) -> Dict[str, str]:
-    """Ensure all labels exist. Return mapping name -> id."""
+    """Ensure all labels exist. Return mapping name -> id (one list call, creates only what's missing)."""
+    existing = list_labels(service)
     out = {}
     for n in names:
-        out[n] = ensure_label(service, n)
+        if n not in existing:
+            body = {
+                "name": n,
+                "labelListVisibility": "labelShow",
+                "messageListVisibility": "show",
+            }
+            with metrics.span("gmail_request", method="labels.create"):
+                existing[n] = service.users().labels().create(userId="me", body=body).execute()["id"]
+        out[n] = existing[n]
     return out
 
 
 def apply_labels(service, msg_id: str, add_label_ids: list[str], remove_label_ids: Optional[list[str]] = None):
     body = {"addLabelIds": add_label_ids, "removeLabelIds": remove_label_ids or []}
-    return service.users().messages().modify(userId="me", id=msg_id, body=body).execute()
+    metrics.inc("label_writes")
+    with metrics.span("gmail_request", method="messages.modify"):
+        return service.users().messages().modify(userId="me", id=msg_id, body=body).execute()
+
+
+def batch_modify(service, msg_ids: list[str], add_label_ids: list[str], remove_label_ids: Optional[list[str]] = None):
+    """One call for up to 1000 messages (same label change applied to all)."""
+    for i in range(0, len(msg_ids), 1000):
+        body = {
+            "ids": msg_ids[i : i + 1000],
+            "addLabelIds": add_label_ids,
+            "removeLabelIds": remove_label_ids or [],
+        }
+        metrics.inc("label_writes", len(body["ids"]))
+        with metrics.span("gmail_request", method="messages.batchModify"):
+            service.users().messages().batchModify(userId="me", body=body).execute()
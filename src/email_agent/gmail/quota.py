@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict
+
+# Per-method Gmail API quota units (developers.google.com/gmail/api/reference/quota)
+QUOTA_UNITS: Dict[str, int] = {
+    "messages.list": 5,
+    "messages.get": 5,
+    "messages.modify": 5,
+    "messages.batchModify": 50,
+    "threads.get": 10,
+    "threads.list": 10,
+    "labels.list": 1,
+    "labels.get": 1,
+    "labels.create": 5,
+    "getProfile": 1,
+    "settings.filters.list": 1,
+    "settings.filters.get": 1,
+    "settings.filters.create": 5,
+    "settings.filters.delete": 5,
+}
+
+
+class QuotaExceeded(RuntimeError):
+    pass
+
+
+class _Resource:
+    def __init__(self, budget: "QuotaBudget", obj: Any, path: tuple[str, ...]):
+        self._budget = budget
+        self._obj = obj
+        self._path = path
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._obj, name)
+        path = self._path + (name,)
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if hasattr(result, "execute"):
+                # ("users", "messages", "get") -> "messages.get"
+                return _Request(self._budget, result, ".".join(path[1:]))
+            return _Resource(self._budget, result, path)
+
+        return call
+
+
+class _Request:
+    def __init__(self, budget: "QuotaBudget", request: Any, method: str):
+        self._budget = budget
+        self._request = request
+        self.method = method
+
+    def execute(self, *args, **kwargs):
+        self._budget.charge(self.method)
+        return self._request.execute(*args, **kwargs)
+
+
+class QuotaBudget:
+    """
+    Wraps a Gmail service and charges quota units per executed request.
+
+    Raises QuotaExceeded *before* sending a request that would overrun the budget,
+    so one mailbox can't burn through the project-wide quota of the others.
+    """
+
+    def __init__(self, service, units: float):
+        self.service = service
+        self.remaining = units
+        self.used = 0.0
+        self._lock = threading.Lock()
+
+    def charge(self, method: str) -> None:
+        cost = QUOTA_UNITS.get(method, 5)
+        with self._lock:
+            if cost > self.remaining:
+                raise QuotaExceeded(f"quota budget exhausted ({self.used:g} units used, {method} needs {cost})")
+            self.remaining -= cost
+            self.used += cost
+
+    def refill(self, units: float) -> None:
+        with self._lock:
+            self.remaining = units
+            self.used = 0.0
+
+    def users(self):
+        return _Resource(self, self.service.users(), ("users",))
@@ -1,26 +1,64 @@
 from __future__ import annotations
 
 import os
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+
+# google-auth / googleapiclient are imported inside the functions below: together they cost
+# ~250ms of startup, and importing this module shouldn't (e.g. the multi-account parent process).
+
+# settings.filters create / delete (install_gmail_filters.py) need gmail.settings.basic
+FILTERS_SCOPE = "https://www.googleapis.com/auth/gmail.settings.basic"
 
 SCOPES = [
     "https://www.googleapis.com/auth/gmail.readonly",
     "https://www.googleapis.com/auth/gmail.modify",
+    FILTERS_SCOPE,
 ]
 
 
-def build_gmail_service():
+def gmail_discovery_document(path: str | None = None) -> str:
     """
-    Builds an authenticated Gmail API service.
+    Pinned local copy of the Gmail v1 discovery document.
+
+    The first call copies the document bundled with google-api-python-client (no network);
+    later calls just read the file, so a library upgrade can't silently change the API surface.
+    Delete the file to re-pin.
 
     Uses env var:
+      GMAIL_DISCOVERY_PATH (default: state/gmail.v1.discovery.json)
+    """
+    path = path or os.getenv("GMAIL_DISCOVERY_PATH", "state/gmail.v1.discovery.json")
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    from googleapiclient.discovery_cache import get_static_doc
+
+    doc = get_static_doc("gmail", "v1")
+    if doc is None:
+        raise RuntimeError("google-api-python-client ships no static gmail v1 discovery document")
+
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(doc)
+        os.replace(tmp, path)
+    except OSError:
+        pass  # read-only filesystem (serverless): use the bundled copy every time
+    return doc
+
+
+def build_gmail_service(token_path: str | None = None):
+    """
+    Builds an authenticated Gmail API service.
+
+    Uses env var (unless token_path is given, e.g. one per account):
       GMAIL_TOKEN_PATH (default: secrets/gmail_token.json)
     Optional:
       GMAIL_OAUTH_CLIENT_PATH (default: secrets/gmail_oauth_client.json)
+      GMAIL_DISCOVERY_PATH (see gmail_discovery_document)
     """
-    token_path = os.getenv("GMAIL_TOKEN_PATH", "secrets/gmail_token.json")
+    token_path = token_path or os.getenv("GMAIL_TOKEN_PATH", "secrets/gmail_token.json")
     client_path = os.getenv("GMAIL_OAUTH_CLIENT_PATH", "secrets/gmail_oauth_client.json")
 
     if not os.path.exists(token_path):
@@ -28,14 +66,19 @@ def build_gmail_service():
             f"Missing token file: {token_path}. Run scripts/auth_gmail_local.py to generate it."
         )
 
+    from google.oauth2.credentials import Credentials
+    from googleapiclient.discovery import build_from_document
+
     creds = Credentials.from_authorized_user_file(token_path, SCOPES)
 
     # refresh if needed
     if creds and creds.expired and creds.refresh_token:
+        from google.auth.transport.requests import Request  # pulls in `requests`: only on refresh
+
         creds.refresh(Request())
         # write back refreshed token
         with open(token_path, "w", encoding="utf-8") as f:
             f.write(creds.to_json())
 
-    service = build("gmail", "v1", credentials=creds, cache_discovery=False)
+    service = build_from_document(gmail_discovery_document(), credentials=creds)
     return service
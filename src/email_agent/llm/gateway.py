@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from multiprocessing.managers import BaseManager
+from typing import Dict, Optional
+
+from email_agent.llm.ollama_client import OllamaClient
+from email_agent.metrics import metrics
+
+
+class LLMGateway:
+    """
+    Single owner of the Ollama connection pool for a group of worker processes.
+
+    - max_concurrency caps in-flight requests at what the model server can actually run
+      (OLLAMA_NUM_PARALLEL). Not a strict FIFO: a request arriving just as a slot frees up
+      can take it ahead of one already waiting, so per-account latency can be uneven under load.
+    - Identical prompts (same mass mail hitting several mailboxes, re-runs) are answered
+      from an LRU classification cache instead of the model.
+    """
+
+    def __init__(self, base_url: str, model: str, *, max_concurrency: int = 1, cache_size: int = 10_000):
+        self.model = model
+        self._client = OllamaClient(base_url=base_url, model=model, max_connections=max_concurrency)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "cache_hits": 0, "errors": 0}
+
+    def _key(self, system: str, user: str, temperature: float, num_predict: int) -> str:
+        h = hashlib.sha256()
+        for part in (self.model, system, user, f"{temperature}", f"{num_predict}"):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def get_model(self) -> str:
+        return self.model
+
+    def chat(self, system: str, user: str, temperature: float = 0.2, num_predict: int = 220,
+             timeout_s: float = 180.0) -> str:
+        return self.chat_timed(system, user, temperature, num_predict, timeout_s)[0]
+
+    def chat_timed(self, system: str, user: str, temperature: float = 0.2, num_predict: int = 220,
+                   timeout_s: float = 180.0) -> tuple[str, Dict[str, float]]:
+        """(text, Ollama timings); the timings are empty for a cache hit."""
+        key = self._key(system, user, temperature, num_predict)
+        with self._lock:
+            self._stats["requests"] += 1
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self._stats["cache_hits"] += 1
+                return self._cache[key], {}
+
+        with self._slots:
+            try:
+                content, timings = self._client.chat_timed(
+                    system=system, user=user, temperature=temperature,
+                    num_predict=num_predict, timeout_s=timeout_s,
+                )
+            except Exception:
+                with self._lock:
+                    self._stats["errors"] += 1
+                raise
+
+        with self._lock:
+            self._cache[key] = content
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return content, timings
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, cached=len(self._cache))
+
+
+class GatewayManager(BaseManager):
+    pass
+
+
+GatewayManager.register("LLMGateway", LLMGateway)
+
+
+def start_gateway(base_url: str, model: str, *, max_concurrency: int = 1,
+                  cache_size: int = 10_000) -> tuple[GatewayManager, "LLMGateway"]:
+    """
+    Start the manager process hosting one LLMGateway. Returns (manager, proxy);
+    the proxy can be handed to worker processes. Call manager.shutdown() when done.
+    """
+    manager = GatewayManager()
+    manager.start()
+    proxy = manager.LLMGateway(base_url, model, max_concurrency=max_concurrency, cache_size=cache_size)
+    return manager, proxy
+
+
+class GatewayClient:
+    """
+    OllamaClient-compatible facade over a gateway proxy (what the analyzer expects).
+
+    The model call happens in the gateway process, so its timings come back with the answer
+    and are recorded here, labeled with the account: metrics plus a running llm_seconds total.
+    """
+
+    def __init__(self, gateway, account: str = ""):
+        self._gateway = gateway
+        self.model = gateway.get_model()
+        self.account = account
+        self.llm_seconds = 0.0          # model time spent on this client's requests (cache hits: 0)
+        self._lock = threading.Lock()
+
+    def chat(self, system: str, user: str, temperature: float = 0.2, num_predict: int = 220,
+             timeout_s: float = 180.0) -> str:
+        return self.chat_timed(system, user, temperature, num_predict, timeout_s)[0]
+
+    def chat_timed(self, system: str, user: str, temperature: float = 0.2, num_predict: int = 220,
+                   timeout_s: float = 180.0) -> tuple[str, Dict[str, float]]:
+        content, timings = self._gateway.chat_timed(system, user, temperature, num_predict, timeout_s)
+        with self._lock:    # the pipeline's LLM scheduler threads share this client
+            self.llm_seconds += sum(timings.values())
+        if metrics.enabled:
+            if not timings:
+                metrics.inc("llm_cache_hits", model=self.model, account=self.account)
+            for phase, seconds in timings.items():
+                metrics.observe(f"llm_{phase}", seconds, model=self.model, account=self.account)
+        return content, timings
+
+    def stats(self) -> Optional[Dict[str, int]]:
+        return self._gateway.stats()
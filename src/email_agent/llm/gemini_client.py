@@ -3,7 +3,6 @@ from __future__ import annotations
 import json
 from typing import Optional
 
-from google import genai
 from email_agent.schemas import EmailAnalysis
 
 
@@ -47,6 +46,8 @@ def analyze_with_gemini(
     date: str,
     snippet: str,
 ) -> EmailAnalysis:
+    from google import genai  # heavy SDK import: only when Gemini is actually used
+
     client = genai.Client(api_key=api_key)  # matches official quickstart pattern :contentReference[oaicite:2]{index=2}
 
     prompt = f"""{SYSTEM}
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Optional
+
+_WS = " \t\r\n"
+
+
+class JsonFieldStream:
+    """
+    Incremental scanner for the top-level fields of the first JSON object in a token stream.
+
+    feed() takes text as it arrives and returns the names of fields whose value just became
+    complete; `fields` holds the parsed values so far and `closed` turns True at the object's
+    closing brace. Text before the first "{" (chatty preambles) is ignored, as is anything
+    after the object closes.
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self.closed = False
+        self._buf: List[str] = []
+        self._depth = 0
+        self._expect = "key"            # key | colon | value | comma (at depth 1)
+        self._in_str = False
+        self._esc = False
+        self._str_role: Optional[str] = None   # "key" | "value" | None (string inside a nested value)
+        self._literal = False           # number / true / false / null in progress
+        self._key: Optional[str] = None
+        self._start = 0                 # buffer offset where the current key / value began
+
+    def _raw(self, end: int) -> str:
+        return "".join(self._buf[self._start : end])
+
+    def _complete(self, raw: str, done: List[str]) -> None:
+        try:
+            self.fields[self._key] = json.loads(raw)
+            done.append(self._key)
+        except (ValueError, TypeError):
+            pass  # malformed value: leave it out, the caller falls back to the full text
+        self._expect = "comma"
+
+    def feed(self, text: str) -> List[str]:
+        done: List[str] = []
+        for c in text:
+            if self.closed:
+                break
+            pos = len(self._buf)
+            self._buf.append(c)
+
+            if self._depth == 0:
+                if c == "{":
+                    self._depth = 1
+                    self._expect = "key"
+                continue
+
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif c == "\\":
+                    self._esc = True
+                elif c == '"':
+                    self._in_str = False
+                    if self._str_role == "key":
+                        self._key = json.loads(self._raw(pos + 1))
+                        self._expect = "colon"
+                    elif self._str_role == "value":
+                        self._complete(self._raw(pos + 1), done)
+                continue
+
+            if self._literal:
+                if c not in _WS and c not in ",}":
+                    continue
+                self._literal = False
+                self._complete(self._raw(pos), done)
+                # fall through: the delimiter itself still needs handling
+
+            if c == '"':
+                self._in_str = True
+                self._str_role = None
+                if self._depth == 1 and self._expect in ("key", "value"):
+                    self._str_role = self._expect
+                    self._start = pos
+            elif c in "{[":
+                if self._depth == 1 and self._expect == "value":
+                    self._start = pos
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+                if self._depth == 1 and self._expect == "value":
+                    self._complete(self._raw(pos + 1), done)
+                elif self._depth == 0:
+                    self.closed = True
+            elif self._depth == 1:
+                if c == ":" and self._expect == "colon":
+                    self._expect = "value"
+                elif c == ",":
+                    self._expect = "key"
+                elif c not in _WS and self._expect == "value":
+                    self._literal = True
+                    self._start = pos
+        return done
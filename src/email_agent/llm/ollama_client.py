@@ -1,13 +1,52 @@
 from __future__ import annotations
 
-import httpx
-from typing import Any, Dict, Optional
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from email_agent.metrics import metrics
+
+_NS = 1e9
 
 
 class OllamaClient:
-    def __init__(self, base_url: str = "http://localhost:11434", model: str = "llama3.1"):
+    def __init__(
+        self,
+        base_url: str = "http://localhost:11434",
+        model: str = "llama3.1",
+        max_connections: int = 8,
+    ):
         self.base_url = base_url.rstrip("/")
         self.model = model
+        self.max_connections = max_connections
+        self._http = None
+        self._http_lock = threading.Lock()
+
+    @property
+    def http(self):
+        # One keep-alive pool per client (thread-safe); a fresh connection per call
+        # costs a TCP handshake on every email that reaches the LLM.
+        # Created on first use: httpx takes ~150ms to import, and runs answered
+        # entirely from state / reputation / rules never need it.
+        if self._http is None:
+            with self._http_lock:
+                if self._http is None:
+                    import httpx
+
+                    self._http = httpx.Client(
+                        timeout=httpx.Timeout(180.0, connect=10.0),
+                        limits=httpx.Limits(
+                            max_connections=self.max_connections,
+                            max_keepalive_connections=self.max_connections,
+                        ),
+                    )
+        return self._http
+
+    def close(self) -> None:
+        if self._http is not None:
+            self._http.close()
+            self._http = None
 
     def chat(
         self,
@@ -17,14 +56,111 @@ class OllamaClient:
         num_predict: int = 220,          # cap output length (helps a LOT)
         timeout_s: float = 180.0,        # increase timeout for cold start
     ) -> str:
-        url = f"{self.base_url}/api/chat"
+        return self.chat_timed(system, user, temperature, num_predict, timeout_s)[0]
+
+    def chat_timed(
+        self,
+        system: str,
+        user: str,
+        temperature: float = 0.2,
+        num_predict: int = 220,
+        timeout_s: float = 180.0,
+    ) -> tuple[str, Dict[str, float]]:
+        """
+        chat(), plus Ollama's timing breakdown of this call (seconds). Returned rather than
+        kept on the client: one client is shared by the scheduler / backfill worker threads.
+        """
+        http = self.http
+        import httpx
+
+        payload = self._payload(system, user, temperature, num_predict, stream=False)
+        timeout = httpx.Timeout(timeout_s, connect=10.0, read=timeout_s, write=timeout_s)
+
+        t0 = time.perf_counter()
+        with metrics.span("llm_request", model=self.model):
+            r = http.post(f"{self.base_url}/api/chat", json=payload, timeout=timeout)
+            r.raise_for_status()
+            data = r.json()
+        timings = self._record_timings(data, time.perf_counter() - t0)
+
+        return (data.get("message") or {}).get("content", "") or "", timings
+
+    def chat_stream(
+        self,
+        system: str,
+        user: str,
+        temperature: float = 0.2,
+        num_predict: int = 220,
+        timeout_s: float = 180.0,
+        on_chunk: Optional[Callable[[str], bool]] = None,
+    ) -> tuple[str, Dict[str, float]]:
+        """
+        Same request as chat() with "stream": true. on_chunk(text) sees every piece as it
+        arrives; returning True stops early: the response is closed, which makes Ollama
+        cancel the generation, and the text received so far is returned.
+
+        Trade-off: a connection closed mid-body can't go back to the keep-alive pool, so the
+        call after an early stop opens a new one (~1ms on localhost). Reading the stream to its
+        end instead would keep the model generating tokens nobody reads, for far longer.
+
+        Returns (text, timings) like chat_timed(), plus "ttft" (time to first token); on an early
+        stop Ollama's final duration fields never arrive, so only ttft and the wall-clock generation are known.
+        """
+        http = self.http
+        import httpx
+
+        payload = self._payload(system, user, temperature, num_predict, stream=True)
+        timeout = httpx.Timeout(timeout_s, connect=10.0, read=timeout_s, write=timeout_s)
+
+        parts: list[str] = []
+        final: Optional[Dict[str, Any]] = None
+        ttft: Optional[float] = None
+        stopped = False
 
-        payload: Dict[str, Any] = {
+        t0 = time.perf_counter()
+        with metrics.span("llm_request", model=self.model):
+            with http.stream("POST", f"{self.base_url}/api/chat", json=payload, timeout=timeout) as r:
+                r.raise_for_status()
+                for line in r.iter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    if data.get("error"):
+                        raise RuntimeError(f"Ollama stream error: {data['error']}")
+                    text = (data.get("message") or {}).get("content", "") or ""
+                    if text:
+                        if ttft is None:
+                            ttft = time.perf_counter() - t0
+                        parts.append(text)
+                    if data.get("done"):
+                        final = data
+                        break
+                    if text and on_chunk is not None and on_chunk(text):
+                        stopped = True
+                        break
+        wall = time.perf_counter() - t0
+
+        if final is not None:
+            timings = self._record_timings(final, wall)
+        else:
+            timings = {"generation": wall - (ttft or 0.0)}
+            if metrics.enabled:
+                metrics.inc("llm_tokens", len(parts), kind="completion")
+        timings["ttft"] = ttft if ttft is not None else wall
+        if metrics.enabled:
+            metrics.observe("llm_ttft", timings["ttft"], model=self.model)
+            if stopped:
+                metrics.inc("llm_early_stops", model=self.model)
+
+        return "".join(parts), timings
+
+    def _payload(self, system: str, user: str, temperature: float, num_predict: int, *, stream: bool) -> Dict[str, Any]:
+        return {
             "model": self.model,
-            "stream": False,
+            "stream": stream,
             "options": {
                 "temperature": temperature,
-                "num_predict": num_predict,
+                "num_predict": num_predict,     # cap output length (helps a LOT)
             },
             "messages": [
                 {"role": "system", "content": system},
@@ -32,14 +168,26 @@ class OllamaClient:
             ],
         }
 
-        timeout = httpx.Timeout(timeout_s, connect=10.0, read=timeout_s, write=timeout_s)
-
-        with httpx.Client(timeout=timeout) as client:
-            r = client.post(url, json=payload)
-            r.raise_for_status()
-            data = r.json()
-
-        return (data.get("message") or {}).get("content", "") or ""
+    def _record_timings(self, data: Dict[str, Any], wall_s: float) -> Dict[str, float]:
+        """
+        Split wall time using Ollama's response fields (nanoseconds):
+        queue = wall - total_duration (HTTP + waiting for a free model slot),
+        load = load_duration, prompt = prompt_eval_duration, generation = eval_duration.
+        """
+        total = (data.get("total_duration") or 0) / _NS
+        timings = {
+            "queue": max(0.0, wall_s - total) if total else 0.0,
+            "load": (data.get("load_duration") or 0) / _NS,
+            "prompt_eval": (data.get("prompt_eval_duration") or 0) / _NS,
+            "generation": (data.get("eval_duration") or 0) / _NS,
+        }
+        if not metrics.enabled:
+            return timings
+        for phase, seconds in timings.items():
+            metrics.observe(f"llm_{phase}", seconds, model=self.model)
+        metrics.inc("llm_tokens", data.get("prompt_eval_count") or 0, kind="prompt")
+        metrics.inc("llm_tokens", data.get("eval_count") or 0, kind="completion")
+        return timings
 
     def warmup(self) -> None:
         # tiny request to ensure model is loaded
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Dict, Tuple
+
+# Seconds. Covers regex passes (sub-ms) through cold LLM generations.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, n_buckets: int):
+        self.counts = [0] * n_buckets
+        self.sum = 0.0
+        self.count = 0
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("_registry", "_name", "_labels", "_t0")
+
+    def __init__(self, registry: "MetricsRegistry", name: str, labels: Dict[str, str]):
+        self._registry = registry
+        self._name = name
+        self._labels = labels
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._registry.observe(self._name, time.perf_counter() - self._t0, **self._labels)
+        if exc_type is not None:
+            self._registry.inc("errors", stage=self._name, error=exc_type.__name__)
+        return False
+
+
+class MetricsRegistry:
+    """
+    In-process counters + latency histograms.
+
+    `span()` times a block into a histogram; `inc()` bumps a counter. When disabled,
+    every call returns immediately (span() hands back a shared no-op context manager),
+    so instrumentation can stay on hot paths.
+    """
+
+    def __init__(self, *, enabled: bool = True, prefix: str = "sabaki", buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters: Dict[_Key, float] = {}
+        self._histograms: Dict[_Key, _Histogram] = {}
+
+    # ---- recording ----
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            h = self._histograms.get(key)
+            if h is None:
+                h = self._histograms[key] = _Histogram(len(self.buckets))
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    h.counts[i] += 1
+                    break
+            h.sum += seconds
+            h.count += 1
+
+    def span(self, name: str, **labels):
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, name, labels)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    # ---- export ----
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (0.0.4)."""
+        def fmt_labels(labels, extra=()):
+            items = list(labels) + list(extra)
+            if not items:
+                return ""
+            body = ",".join(f'{k}="{_escape(v)}"' for k, v in items)
+            return "{" + body + "}"
+
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                (k, (list(h.counts), h.sum, h.count)) for k, h in self._histograms.items()
+            )
+
+        lines: list[str] = []
+        typed: set[str] = set()
+        for (name, labels), value in counters:
+            metric = f"{self.prefix}_{name}_total"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{metric}{fmt_labels(labels)} {value:g}")
+
+        for (name, labels), (counts, total, count) in histograms:
+            metric = f"{self.prefix}_{name}_seconds"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            cumulative = 0
+            for bound, c in zip(self.buckets, counts):
+                cumulative += c
+                lines.append(f"{metric}_bucket{fmt_labels(labels, [('le', f'{bound:g}')])} {cumulative}")
+            lines.append(f"{metric}_bucket{fmt_labels(labels, [('le', '+Inf')])} {count}")
+            lines.append(f"{metric}_sum{fmt_labels(labels)} {total:.6f}")
+            lines.append(f"{metric}_count{fmt_labels(labels)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict:
+        """{"spans": {"name{labels}": {count, total_s, mean_ms}}, "counters": {"name{labels}": value}}"""
+        def key_str(name, labels):
+            return name + ("{" + ",".join(f"{k}={v}" for k, v in labels) + "}" if labels else "")
+
+        with self._lock:
+            spans = {
+                key_str(name, labels): {
+                    "count": h.count,
+                    "total_s": round(h.sum, 6),
+                    "mean_ms": round(1000 * h.sum / h.count, 3) if h.count else 0.0,
+                }
+                for (name, labels), h in sorted(self._histograms.items())
+            }
+            counters = {key_str(name, labels): v for (name, labels), v in sorted(self._counters.items())}
+        return {"spans": spans, "counters": counters}
+
+    def format_summary(self) -> str:
+        s = self.summary()
+        if not s["spans"] and not s["counters"]:
+            return ""
+        rows = sorted(s["spans"].items(), key=lambda kv: kv[1]["total_s"], reverse=True)
+        width = max((len(k) for k in list(s["spans"]) + list(s["counters"])), default=10)
+        out = [f"{'stage':<{width}}  {'count':>7}  {'total_s':>9}  {'mean_ms':>9}"]
+        for k, v in rows:
+            out.append(f"{k:<{width}}  {v['count']:>7}  {v['total_s']:>9.3f}  {v['mean_ms']:>9.3f}")
+        for k, v in s["counters"].items():
+            out.append(f"{k:<{width}}  {v:>7g}")
+        return "\n".join(out)
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# Process-wide registry. METRICS_ENABLED=0 turns every call into a no-op.
+metrics = MetricsRegistry(enabled=os.getenv("METRICS_ENABLED", "1") != "0")
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+from email_agent.gmail.fetch import list_message_page
+from email_agent.gmail.quota import QuotaBudget, QuotaExceeded
+from email_agent.llm.gateway import GatewayClient
+from email_agent.pipeline.reputation import SenderReputation
+from email_agent.pipeline.runner import LabelPipeline, RunSummary
+from email_agent.state.store import StateStore
+
+
+@dataclass
+class AccountSpec:
+    name: str
+    token_path: str
+    state_db: str                   # isolated state per mailbox
+    quota_units: float = 25_000     # per-run Gmail quota budget for this mailbox
+
+
+@dataclass
+class SliceResult:
+    account: str
+    checked: int = 0
+    labeled: int = 0
+    skipped: int = 0
+    errors: int = 0
+    units_used: float = 0.0
+    next_page_token: Optional[str] = None
+    quota_exhausted: bool = False
+    elapsed_s: float = 0.0
+    llm_s: float = 0.0              # model time (queue + load + prompt + generation) in the gateway
+    error: Optional[str] = None     # the slice failed (bad token, Gmail error, ...); the account stops here
+
+
+@dataclass
+class AccountReport:
+    account: str
+    checked: int = 0
+    labeled: int = 0
+    skipped: int = 0
+    errors: int = 0
+    units_used: float = 0.0
+    slices: int = 0
+    quota_exhausted: bool = False
+    elapsed_s: float = 0.0
+    llm_s: float = 0.0
+    error: Optional[str] = None
+    done: bool = field(default=False, repr=False)
+
+
+def account_from_token(token_path: str, *, state_dir: str = "state", quota_units: float = 25_000) -> AccountSpec:
+    name = os.path.splitext(os.path.basename(token_path))[0]
+    return AccountSpec(
+        name=name,
+        token_path=token_path,
+        state_db=os.path.join(state_dir, f"{name}.db"),
+        quota_units=quota_units,
+    )
+
+
+def build_account_service(account: AccountSpec):
+    from email_agent.gmail.service import build_gmail_service
+    return build_gmail_service(account.token_path)
+
+
+# ---- worker process side ----
+
+_gateway = None
+_service_factory: Optional[Callable[[AccountSpec], object]] = None
+_pipelines: Dict[str, tuple[LabelPipeline, QuotaBudget]] = {}
+
+
+def _init_worker(gateway, service_factory) -> None:
+    global _gateway, _service_factory
+    _gateway = gateway
+    _service_factory = service_factory
+
+
+def _pipeline_for(account: AccountSpec, units: float) -> tuple[LabelPipeline, QuotaBudget]:
+    # one service/store/pipeline per account per worker: later slices skip OAuth + discovery + label setup
+    if account.name not in _pipelines:
+        budget = QuotaBudget(_service_factory(account), units)
+        store = StateStore(account.state_db)
+        pipeline = LabelPipeline(
+            budget,
+            store=store,
+            client=GatewayClient(_gateway, account=account.name),
+            reputation=SenderReputation.from_env(store),
+            log=lambda msg: print(f"[{account.name}] {msg}", flush=True),
+        )
+        _pipelines[account.name] = (pipeline, budget)
+    else:
+        _pipelines[account.name][1].refill(units)
+    return _pipelines[account.name]
+
+
+def _run_slice(account: AccountSpec, page_token: Optional[str], offset: int, units: float,
+               batch_size: int, thread_mode: bool) -> SliceResult:
+    """
+    One page of one account: list, the search-only pre-pass of LabelPipeline.run (PROCESSED
+    pre-list + pushdown rules, scoped to the page), then process. offset: messages of the
+    account checked before this page.
+    """
+    t0 = time.perf_counter()
+    result = SliceResult(account=account.name)
+    summary = RunSummary()
+    pipeline = budget = None
+    llm_before = 0.0
+    try:
+        pipeline, budget = _pipeline_for(account, units)
+        llm_before = pipeline.client.llm_seconds
+        refs, result.next_page_token = list_message_page(budget, page_size=batch_size, page_token=page_token)
+        pipeline.prefilter({msg_id for msg_id, _ in refs}, depth=offset + len(refs), summary=summary)
+        pipeline.process(refs, thread_mode=thread_mode, summary=summary)
+    except QuotaExceeded:
+        result.quota_exhausted = True
+        result.next_page_token = None
+    except Exception as ex:
+        # missing / revoked token, RefreshError, HttpError...: only this account stops
+        result.error = f"{type(ex).__name__}: {ex}"
+        result.next_page_token = None
+        dropped = _pipelines.pop(account.name, None)
+        if dropped:
+            dropped[0].store.close()
+    result.checked, result.labeled = summary.checked, summary.labeled
+    result.skipped, result.errors = summary.skipped, summary.errors
+    result.units_used = budget.used if budget else 0.0
+    result.llm_s = pipeline.client.llm_seconds - llm_before if pipeline else 0.0
+    result.elapsed_s = time.perf_counter() - t0
+    return result
+
+
+# ---- parent side ----
+
+def run_accounts(
+    accounts: list[AccountSpec],
+    *,
+    gateway,
+    workers: Optional[int] = None,
+    batch_size: int = 50,
+    max_emails: int = 500,
+    thread_mode: bool = False,
+    service_factory: Callable[[AccountSpec], object] = build_account_service,
+) -> list[AccountReport]:
+    """
+    Shard mailboxes across a process pool in round-robin slices of batch_size messages.
+
+    Each account has at most one slice in flight, and a finished slice goes to the back
+    of the executor queue, so a big mailbox can't starve the rest. Gmail quota is
+    budgeted per account; LLM calls from every worker go through the one shared gateway.
+    An account whose slice fails (bad token, Gmail error) is reported with `error` and not
+    rescheduled; the other accounts carry on.
+    """
+    reports = {a.name: AccountReport(account=a.name) for a in accounts}
+    by_name = {a.name: a for a in accounts}
+    cursors: Dict[str, Optional[str]] = {}
+
+    workers = workers or min(len(accounts), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(gateway, service_factory)) as pool:
+
+        def submit(name: str):
+            a, rep = by_name[name], reports[name]
+            return pool.submit(
+                _run_slice, a, cursors.get(name), rep.checked,
+                a.quota_units - rep.units_used, batch_size, thread_mode,
+            )
+
+        pending = {submit(a.name): a.name for a in accounts}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name = pending.pop(fut)
+                rep = reports[name]
+                try:
+                    r: SliceResult = fut.result()
+                except Exception as ex:     # the slice never returned (worker died, result not picklable)
+                    r = SliceResult(account=name, error=f"{type(ex).__name__}: {ex}")
+                rep.slices += 1
+                rep.checked += r.checked
+                rep.labeled += r.labeled
+                rep.skipped += r.skipped
+                rep.errors += r.errors
+                rep.units_used += r.units_used
+                rep.elapsed_s += r.elapsed_s
+                rep.llm_s += r.llm_s
+                rep.quota_exhausted = r.quota_exhausted
+                rep.error = r.error
+                cursors[name] = r.next_page_token
+
+                more = r.next_page_token is not None and not r.quota_exhausted and not r.error
+                if more and rep.checked < max_emails:
+                    pending[submit(name)] = name
+                else:
+                    rep.done = True
+
+    return list(reports.values())
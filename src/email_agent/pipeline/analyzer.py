@@ -1,12 +1,30 @@
 from __future__ import annotations
 
 import json
-from typing import Optional
+import os
+import time
+from typing import TYPE_CHECKING, Optional
 
-from email_agent.schemas import EmailAnalysis
+from email_agent.metrics import metrics
+from email_agent.llm.json_stream import JsonFieldStream
 from email_agent.llm.ollama_client import OllamaClient
 from email_agent.text.normalize import normalize_email_text 
 
+if TYPE_CHECKING:
+    from email_agent.schemas import EmailAnalysis
+
+# Bump whenever SYSTEM_PROMPT / user prompt template changes (stored with each decision)
+PROMPT_VERSION = "v2"
+
+# OLLAMA_STREAM=0 falls back to one blocking request per email.
+# LLM_REASONING=1 keeps generating until reasoning_brief is in; otherwise the stream is
+# cancelled as soon as label / urgency / needs_reply are parsed (reasoning is log-only).
+STREAM = os.getenv("OLLAMA_STREAM", "1") == "1"
+KEEP_REASONING = os.getenv("LLM_REASONING", "0") == "1"
+
+_DECISION_FIELDS = {"label", "urgency", "needs_reply"}
+_SKIPPED_REASONING = "(reasoning skipped: stream stopped once the label was parsed)"
+
 SYSTEM_PROMPT = """You are an AI email assistant for a job-application inbox.
 You MUST output ONLY valid JSON. No markdown. No extra text.
 
@@ -35,8 +53,8 @@ Schema (return EXACTLY these keys, no more, no less):
 {
   "label": "<ONE of the allowed label strings>",
   "urgency": "<low|medium|high>",
-  "reasoning_brief": "<1 short sentence>",
-  "needs_reply": boolean
+  "needs_reply": boolean,
+  "reasoning_brief": "<1 short sentence>"
 }
 
 Rules:
@@ -70,6 +88,31 @@ def _safe_json_extract(text: str) -> Optional[dict]:
     return None
 
 
+def _chat_streaming(client: OllamaClient, user_prompt: str) -> tuple[str, Optional[dict]]:
+    """
+    Stream the answer and parse fields as they complete; stop generating once the
+    object closes, or (unless KEEP_REASONING) once the decision fields are in.
+    """
+    fields = JsonFieldStream()
+    t0 = time.perf_counter()
+
+    def on_chunk(text: str) -> bool:
+        if "label" in fields.feed(text):
+            # the label is known here, before the rest of the generation
+            metrics.observe("llm_time_to_label", time.perf_counter() - t0)
+        if fields.closed:
+            return True
+        return not KEEP_REASONING and _DECISION_FIELDS <= fields.fields.keys()
+
+    raw, _ = client.chat_stream(system=SYSTEM_PROMPT, user=user_prompt, temperature=0.2, on_chunk=on_chunk)
+
+    if fields.closed or _DECISION_FIELDS <= fields.fields.keys():
+        obj = dict(fields.fields)
+        obj.setdefault("reasoning_brief", _SKIPPED_REASONING)
+        return raw, obj
+    return raw, _safe_json_extract(raw)
+
+
 def analyze_email_with_ollama(
     *,
     subject: str,
@@ -78,14 +121,16 @@ def analyze_email_with_ollama(
     snippet: str,
     client: OllamaClient,
     max_retries: int = 2,
+    thread_context: Optional[str] = None,
 ) -> EmailAnalysis:
     
     # ✅ Normalize + cap before sending to LLM
-    normalized = normalize_email_text(
-        subject=subject,
-        snippet=snippet,
-        max_chars=6000,
-    )
+    with metrics.span("normalize"):
+        normalized = normalize_email_text(
+            subject=subject,
+            snippet=snippet,
+            max_chars=6000,
+        )
 
     user_prompt = f"""Classify this email for a job-application inbox.
 
@@ -94,19 +139,29 @@ Date: {date}
 Subject: {subject}
 Snippet: {normalized}
 
-Return ONLY JSON with EXACT keys: label, urgency, reasoning_brief, needs_reply.
+Return ONLY JSON with EXACT keys, in this order: label, urgency, needs_reply, reasoning_brief.
 The key must be "label" (NOT category).
 Example:
-{{"label":"APPLIED","urgency":"low","reasoning_brief":"Application confirmation.","needs_reply":false}}
+{{"label":"APPLIED","urgency":"low","needs_reply":false,"reasoning_brief":"Application confirmation."}}
 """
 
+    if thread_context:
+        # Latest message of a conversation: give the model the stage reached so far
+        user_prompt += f"\nThread so far: {thread_context}\nLabel the thread's CURRENT stage.\n"
+
+
+    from email_agent.schemas import EmailAnalysis  # pydantic loads on the first LLM call only
 
     last_err = None
 
     for attempt in range(max_retries + 1):
-        raw = client.chat(system=SYSTEM_PROMPT, user=user_prompt, temperature=0.2)
-
-        obj = _safe_json_extract(raw)
+        if attempt:
+            metrics.inc("llm_retries")
+        if STREAM and hasattr(client, "chat_stream"):
+            raw, obj = _chat_streaming(client, user_prompt)
+        else:
+            raw = client.chat(system=SYSTEM_PROMPT, user=user_prompt, temperature=0.2)
+            obj = _safe_json_extract(raw)
         if obj is None:
             last_err = f"Could not parse JSON. Raw output:\n{raw[:500]}"
         else:
@@ -0,0 +1,344 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from email_agent.gmail.fetch import list_message_page
+from email_agent.llm.ollama_client import OllamaClient
+from email_agent.pipeline.reputation import SenderReputation
+from email_agent.pipeline.runner import LabelPipeline, RunSummary
+from email_agent.state.store import StateStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS backfill_shards (
+    backfill   TEXT NOT NULL,              -- job name: re-running with the same name resumes it
+    after_ts   INTEGER NOT NULL,           -- shard = internalDate in [after_ts, before_ts)
+    before_ts  INTEGER NOT NULL,
+    page_token TEXT,                       -- next page to list (NULL: from the start)
+    checked    INTEGER NOT NULL DEFAULT 0,
+    labeled    INTEGER NOT NULL DEFAULT 0,
+    skipped    INTEGER NOT NULL DEFAULT 0,
+    errors     INTEGER NOT NULL DEFAULT 0,
+    done       INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL,
+    PRIMARY KEY (backfill, after_ts)
+) WITHOUT ROWID;
+"""
+
+GMAIL_EPOCH = "2004/04/01"   # nothing in a Gmail mailbox is older than Gmail
+
+
+@dataclass
+class Shard:
+    backfill: str
+    after_ts: int
+    before_ts: int
+    page_token: Optional[str] = None
+    checked: int = 0
+    labeled: int = 0
+    skipped: int = 0
+    errors: int = 0
+    done: bool = False
+
+    def query(self, q: Optional[str] = None) -> str:
+        # Gmail's after: is exclusive; 1s of overlap costs nothing (already-seen IDs are skipped)
+        rng = f"after:{self.after_ts - 1} before:{self.before_ts}"
+        return f"{rng} {q}" if q else rng
+
+    @property
+    def label(self) -> str:
+        day = lambda ts: datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d")
+        return f"{day(self.after_ts)}..{day(self.before_ts)}"
+
+
+@dataclass
+class BackfillSummary:
+    shards: int = 0
+    shards_done: int = 0
+    checked: int = 0
+    labeled: int = 0
+    skipped: int = 0
+    errors: int = 0
+    interrupted: bool = False
+
+
+def parse_day(value: str) -> int:
+    """'YYYY/MM/DD' or 'YYYY-MM-DD' (UTC) -> epoch seconds."""
+    return int(datetime.strptime(value.replace("-", "/"), "%Y/%m/%d").replace(tzinfo=timezone.utc).timestamp())
+
+
+def plan_shards(since_ts: int, until_ts: int, shard_days: float) -> list[tuple[int, int]]:
+    """Fixed date windows, newest first (recent mail is the most useful to have labeled early)."""
+    step = max(1, int(shard_days * 86400))
+    windows = []
+    before = until_ts
+    while before > since_ts:
+        after = max(since_ts, before - step)
+        windows.append((after, before))
+        before = after
+    return windows
+
+
+class BackfillProgress:
+    """Thread-safe counters for the live progress line (rate + ETA)."""
+
+    def __init__(self, *, total_shards: int, shards_done: int, checked_before: int, total_messages: Optional[int]):
+        self._lock = threading.Lock()
+        self.t0 = time.perf_counter()
+        self.total_shards = total_shards
+        self.shards_done = shards_done
+        self._shards_done_before = shards_done
+        self.checked_before = checked_before     # from earlier (interrupted) runs of this job
+        self.total_messages = total_messages     # getProfile estimate; None when filtered by a query
+        self.checked = 0
+        self.labeled = 0
+        self.errors = 0
+
+    def add(self, summary: RunSummary) -> None:
+        with self._lock:
+            self.checked += summary.checked
+            self.labeled += summary.labeled
+            self.errors += summary.errors
+
+    def shard_done(self) -> None:
+        with self._lock:
+            self.shards_done += 1
+
+    def line(self) -> str:
+        with self._lock:
+            elapsed = time.perf_counter() - self.t0
+            rate = self.checked / elapsed if elapsed > 0 else 0.0
+            done = self.checked_before + self.checked
+
+            eta_s: Optional[float] = None
+            finished_now = self.shards_done - self._shards_done_before
+            if self.total_messages and rate > 0:
+                eta_s = max(0, self.total_messages - done) / rate
+            elif finished_now:
+                # no message total (query-filtered): extrapolate from shards finished this session
+                eta_s = elapsed / finished_now * (self.total_shards - self.shards_done)
+
+            total = f"/{self.total_messages}" if self.total_messages else ""
+            eta = _fmt_duration(eta_s) if eta_s is not None else "?"
+            return (
+                f"shards {self.shards_done}/{self.total_shards} | messages {done}{total} "
+                f"| labeled {self.labeled} | errors {self.errors} | {rate:.1f} msg/s | ETA {eta}"
+            )
+
+
+def _fmt_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h}h{m:02d}m" if h else f"{m}m{s:02d}s"
+
+
+class Backfill:
+    """
+    Label a mailbox's whole history: date-range shards listed with Gmail `q` queries,
+    processed by a pool of worker threads, checkpointed per page.
+
+    Each worker owns its Gmail service (googleapiclient/httplib2 objects are not thread-safe),
+    its state store connection (same SQLite file, WAL) and pipeline; the Ollama client is shared.
+    Memory is one list page per worker no matter how big the mailbox is: pages are processed
+    and dropped, and only per-shard counters are kept (in SQLite).
+
+    A crash or Ctrl-C loses at most the in-flight pages; messages already labeled in them
+    are in the state store, so the resumed run skips them without a Gmail get.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        store_path: str,
+        service_factory: Callable[[], object],
+        client: OllamaClient,
+        q: Optional[str] = None,
+        page_size: int = 100,
+        workers: int = 4,
+        thread_mode: bool = False,
+        log: Callable[[str], None] = print,
+    ):
+        self.name = name
+        self.store_path = store_path
+        self.service_factory = service_factory
+        self.client = client
+        self.q = q
+        self.page_size = page_size
+        self.workers = workers
+        self.thread_mode = thread_mode
+        self.log = log
+
+        self.store = StateStore(store_path)
+        self.store.conn.executescript(_SCHEMA)
+        self.store.conn.commit()
+        self._stop = threading.Event()
+
+    # ---- shard bookkeeping ----
+
+    def shards(self) -> list[Shard]:
+        rows = self.store.conn.execute(
+            "SELECT backfill, after_ts, before_ts, page_token, checked, labeled, skipped, errors, done"
+            " FROM backfill_shards WHERE backfill = ? ORDER BY after_ts DESC",
+            (self.name,),
+        ).fetchall()
+        return [Shard(*r[:8], done=bool(r[8])) for r in rows]
+
+    def plan(self, *, since_ts: int, until_ts: int, shard_days: float) -> list[Shard]:
+        """Create the shard rows on the first run; a resumed job keeps its original plan."""
+        existing = self.shards()
+        if existing:
+            return existing
+        self.store.conn.executemany(
+            "INSERT INTO backfill_shards (backfill, after_ts, before_ts, updated_at) VALUES (?, ?, ?, ?)",
+            [(self.name, a, b, time.time()) for a, b in plan_shards(since_ts, until_ts, shard_days)],
+        )
+        self.store.conn.commit()
+        return self.shards()
+
+    def _save(self, store: StateStore, shard: Shard) -> None:
+        store.conn.execute(
+            "UPDATE backfill_shards SET page_token = ?, checked = ?, labeled = ?, skipped = ?, errors = ?,"
+            " done = ?, updated_at = ? WHERE backfill = ? AND after_ts = ?",
+            (
+                shard.page_token, shard.checked, shard.labeled, shard.skipped, shard.errors,
+                int(shard.done), time.time(), shard.backfill, shard.after_ts,
+            ),
+        )
+        store.conn.commit()
+
+    # ---- workers ----
+
+    def stop(self) -> None:
+        """Finish the pages in flight, checkpoint, return."""
+        self._stop.set()
+
+    def _pipeline(self) -> LabelPipeline:
+        store = StateStore(self.store_path)
+        return LabelPipeline(
+            self.service_factory(),
+            store=store,
+            client=self.client,
+            reputation=SenderReputation.from_env(store),
+            log=self.log,
+        )
+
+    def _worker(self, pipeline: LabelPipeline, todo: "queue.Queue[Shard]", progress: BackfillProgress,
+                failures: list) -> None:
+        try:
+            while not self._stop.is_set():
+                try:
+                    shard = todo.get_nowait()
+                except queue.Empty:
+                    return
+                self._run_shard(pipeline, pipeline.store, shard, progress)
+        except Exception as ex:
+            failures.append(ex)
+            self._stop.set()
+        finally:
+            pipeline.store.close()
+
+    def _run_shard(self, pipeline: LabelPipeline, store: StateStore, shard: Shard, progress: BackfillProgress) -> None:
+        q = shard.query(self.q)
+        if shard.page_token is None and not self._stop.is_set():
+            # label-only mail in the whole date range, a few calls per thousand messages; the pages
+            # below then list those messages as already known (counted as skipped there)
+            pre = pipeline.pushdown(q=q)
+            shard.labeled += pre.labeled
+            self._save(store, shard)
+            progress.add(pre)
+
+        while not self._stop.is_set():
+            try:
+                refs, next_token = list_message_page(
+                    pipeline.service, page_size=self.page_size, q=q, page_token=shard.page_token
+                )
+            except Exception as ex:
+                if not shard.page_token:
+                    raise
+                # page tokens don't live forever: restart the shard, seen IDs are skipped cheaply
+                self.log(f"⚠️ Shard {shard.label}: saved page token rejected ({type(ex).__name__}), restarting shard")
+                shard.page_token = None
+                continue
+
+            summary = pipeline.process(refs, thread_mode=self.thread_mode)
+            shard.checked += summary.checked
+            shard.labeled += summary.labeled
+            shard.skipped += summary.skipped
+            shard.errors += summary.errors
+            shard.page_token = next_token
+            shard.done = next_token is None
+            self._save(store, shard)
+            progress.add(summary)
+
+            if shard.done:
+                progress.shard_done()
+                return
+
+    # ---- entry point ----
+
+    def run(
+        self,
+        *,
+        since_ts: int,
+        until_ts: int,
+        shard_days: float = 30.0,
+        total_messages: Optional[int] = None,
+        progress_every_s: float = 2.0,
+        on_progress: Callable[[str], None] = print,
+    ) -> BackfillSummary:
+        shards = self.plan(since_ts=since_ts, until_ts=until_ts, shard_days=shard_days)
+        pending = [s for s in shards if not s.done]
+
+        progress = BackfillProgress(
+            total_shards=len(shards),
+            shards_done=len(shards) - len(pending),
+            checked_before=sum(s.checked for s in shards),
+            total_messages=total_messages,
+        )
+
+        todo: "queue.Queue[Shard]" = queue.Queue()
+        for shard in pending:
+            todo.put(shard)
+
+        # pipelines are built one after another: on a fresh mailbox concurrent ensure_labels
+        # calls would all try to create the same labels
+        pipelines = [self._pipeline() for _ in range(min(self.workers, len(pending)))]
+        failures: list[Exception] = []
+        threads = [
+            threading.Thread(target=self._worker, args=(pipeline, todo, progress, failures), daemon=True)
+            for pipeline in pipelines
+        ]
+        for t in threads:
+            t.start()
+
+        interrupted = False
+        try:
+            while any(t.is_alive() for t in threads):
+                for t in threads:
+                    t.join(timeout=progress_every_s / max(1, len(threads)))
+                on_progress(progress.line())
+        except KeyboardInterrupt:
+            # first Ctrl-C: let workers checkpoint their current page; a second one aborts
+            interrupted = True
+            self.stop()
+            on_progress("Stopping after the pages in flight (Ctrl-C again to abort)...")
+            for t in threads:
+                t.join()
+
+        if failures:
+            raise failures[0]
+
+        summary = BackfillSummary(shards=len(shards), interrupted=interrupted or self._stop.is_set())
+        for s in self.shards():
+            summary.shards_done += s.done
+            summary.checked += s.checked
+            summary.labeled += s.labeled
+            summary.skipped += s.skipped
+            summary.errors += s.errors
+        return summary
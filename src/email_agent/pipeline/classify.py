@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Optional, Union
+
+from email_agent.gmail.fetch_body import fetch_email_body_text
+from email_agent.llm.ollama_client import OllamaClient
+from email_agent.pipeline.analyzer import analyze_email_with_ollama, PROMPT_VERSION
+from email_agent.pipeline.reputation import SenderReputation
+from email_agent.pipeline.rules import match_rule, needs_body_fetch
+from email_agent.schemas import JobLabel
+
+if TYPE_CHECKING:
+    from email_agent.schemas import EmailAnalysis
+
+
+@dataclass
+class Decision:
+    label: JobLabel
+    source: str                          # "reputation" | "rule" | "llm" | "thread"
+    reasoning: str
+    rule: Optional[str] = None
+    model: Optional[str] = None
+    prompt_version: Optional[str] = None
+
+
+@dataclass
+class LLMJob:
+    """The LLM tier of classify_email, packaged to run later (no Gmail calls left in it)."""
+    e: Any
+    text: str                           # snippet, plus the body when it was fetched
+    thread_context: Optional[str] = None
+
+    def run(self, client: OllamaClient) -> Decision:
+        analysis: EmailAnalysis = analyze_email_with_ollama(
+            subject=self.e.subject,
+            from_email=self.e.from_email,
+            snippet=self.text,
+            date=self.e.date,
+            client=client,
+            thread_context=self.thread_context,
+        )
+        return Decision(
+            label=analysis.label,
+            source="llm",
+            reasoning=analysis.reasoning_brief,
+            model=client.model,
+            prompt_version=PROMPT_VERSION,
+        )
+
+
+def reputation_decision(reputation: SenderReputation, from_email: str) -> Optional[Decision]:
+    verdict = reputation.predict(from_email)
+    if not verdict:
+        return None
+    return Decision(
+        label=verdict.label,
+        source="reputation",
+        reasoning=f"sender_reputation {verdict.key} ({verdict.share:.0%} of {verdict.support:.0f})",
+        rule=verdict.key,
+    )
+
+
+def classify_email(
+    service,
+    e,
+    *,
+    client: OllamaClient,
+    body_text: Optional[str] = None,
+    thread_context: Optional[str] = None,
+    reputation: Optional[SenderReputation] = None,
+    defer_llm: bool = False,
+) -> Union[Decision, "LLMJob"]:
+    """
+    Rules on the snippet, then sender reputation (From header only),
+    then rules on the body (only when needed), then LLM.
+
+    body_text: pass it when the caller already holds the decoded body
+    (format=full fetch / threads.get) to avoid a second messages.get.
+    defer_llm: return an LLMJob instead of calling the model, so the caller can schedule it.
+    """
+    # short-circuit first (snippet)
+    hit = match_rule(e.subject, e.snippet, e.from_email)
+    risky = needs_body_fetch(e.subject, e.snippet)
+
+    # zero-cost: sender that (almost) always gets the same label. Never for risky templates:
+    # a rejection from a sender that usually confirms applications must be read, not guessed
+    if hit is None and not risky and reputation is not None:
+        decision = reputation_decision(reputation, e.from_email)
+        if decision:
+            return decision
+
+    # If risky template OR forced=APPLIED but could be rejection later, fetch body and re-check
+    body = ""
+    if (hit is None) or risky:
+        body = body_text if body_text is not None else fetch_email_body_text(service, e.message_id)
+
+    if body:
+        hit2 = match_rule(e.subject, f"{e.snippet}\n{body}", e.from_email)
+        if hit2:
+            hit = hit2
+
+    if hit:
+        rule_name, label = hit
+        return Decision(label=label, source="rule", reasoning="rule_short_circuit", rule=rule_name)
+
+    # LLM fallback (Ollama)
+    job = LLMJob(e=e, text=(f"{e.snippet}\n{body}" if body else e.snippet), thread_context=thread_context)
+    return job if defer_llm else job.run(client)
@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import os
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from email.utils import parseaddr
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from email_agent.config import JOB_LABELS, PROCESSED_LABEL
+from email_agent.gmail.labels import ensure_labels
+from email_agent.gmail.service import FILTERS_SCOPE
+from email_agent.metrics import metrics
+from email_agent.pipeline.pushdown import PUSHDOWN_RULES, stage_guard
+from email_agent.pipeline.reputation import is_relay_domain, is_shared_domain
+from email_agent.schemas import JobLabel
+from email_agent.state.store import StateStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS gmail_filters (
+    filter_id    TEXT PRIMARY KEY,         -- Gmail's filter ID
+    batch        INTEGER NOT NULL,         -- one install run: rollback removes a whole batch
+    kind         TEXT NOT NULL,            -- "from" | "subject" | "query"
+    value        TEXT NOT NULL,
+    label        TEXT NOT NULL,
+    support      INTEGER NOT NULL,         -- decisions behind it when installed
+    share        REAL NOT NULL,
+    installed_at REAL NOT NULL,
+    removed_at   REAL
+) WITHOUT ROWID;
+"""
+
+# Decisions made on the message's own content. Reputation rows are guesses from the sender
+# history itself (mining them would confirm the guesses); thread / pushdown / processed_label
+# rows carry no sender evidence of their own
+_MINED_SOURCES = ("rule", "llm")
+
+# A filter can't notice a stage change (or thread history): these stay with the agent
+_AGENT_ONLY = {JobLabel.OTHERS, JobLabel.INTERVIEWS, JobLabel.ASSESSMENTS, JobLabel.IN_PROCESS}
+
+# Same as LabelPipeline._label_change
+_MARK_READ = {JobLabel.APPLIED, JobLabel.REJECTED, JobLabel.ADVERTISEMENTS}
+
+@dataclass
+class FilterCandidate:
+    kind: str               # "from" (address or @domain) | "subject" (exact, normalized) | "query" (pushdown rule)
+    value: str
+    label: JobLabel
+    support: int            # decisions seen for this sender / subject / rule
+    share: float            # fraction of them with `label`
+
+    def criteria(self) -> Dict[str, str]:
+        if self.kind == "query":
+            return {"query": f"{self.value} {stage_guard(self.label)}"}
+        value = self.value if self.kind == "from" else f'"{self.value}"'
+        return {self.kind: value, "query": stage_guard(self.label)}
+
+    def action(self, label_ids: Dict[str, str]) -> Dict[str, list[str]]:
+        return {
+            "addLabelIds": [label_ids[self.label.value], label_ids[PROCESSED_LABEL]],
+            "removeLabelIds": ["UNREAD"] if self.label in _MARK_READ else [],
+        }
+
+    def describe(self) -> str:
+        read = " +read" if self.label in _MARK_READ else ""
+        return f"{self.kind}:{self.value} -> {self.label.value}{read} ({self.share:.0%} of {self.support})"
+
+
+def _top(counts: Counter, *, min_support: int, min_share: float,
+         allowed: set[JobLabel]) -> Optional[tuple[JobLabel, int, float]]:
+    total = sum(counts.values())
+    if total < min_support:
+        return None
+    label, n = counts.most_common(1)[0]
+    if label not in JobLabel._value2member_map_ or JobLabel(label) not in allowed:
+        return None
+    share = n / total
+    return (JobLabel(label), total, share) if share >= min_share else None
+
+
+def mine_candidates(
+    store: StateStore,
+    *,
+    min_support: int = 10,
+    min_share: float = 0.98,
+    lookback_days: float = 90.0,
+    labels: Optional[Iterable[JobLabel]] = None,
+) -> list[FilterCandidate]:
+    """
+    Sender / subject -> label mappings the decision history is sure about, most-used first.
+
+    Senders: an @domain filter when every address of the domain is itself confident in the same
+    label (two or more addresses, not a freemail / ATS / job-board domain), otherwise one per
+    address. None for ATS / job-board addresses: one of those mails confirmations and rejections for many
+    employers, and a filter would mark a rejection read on arrival. Subjects: exact (normalized)
+    subjects seen from several senders, none of them ATS / job-board addresses (same reason), when those
+    senders aren't all covered by a sender candidate.
+    Pushdown rules that labeled at least min_support messages become query filters as they are
+    (their rows carry no sender to mine).
+    """
+    allowed = set(labels) if labels is not None else set(JobLabel) - _AGENT_ONLY
+    since = time.time() - lookback_days * 86400
+    marks = ",".join("?" * len(_MINED_SOURCES))
+    rows = store.conn.execute(
+        f"SELECT from_email, subject, label FROM messages"
+        f" WHERE source IN ({marks}) AND label != '' AND processed_at >= ?",
+        (*_MINED_SOURCES, since),
+    )
+
+    by_addr: Dict[str, Counter] = defaultdict(Counter)
+    by_domain: Dict[str, Counter] = defaultdict(Counter)
+    domain_addrs: Dict[str, set[str]] = defaultdict(set)
+    by_subject: Dict[str, Counter] = defaultdict(Counter)
+    subject_addrs: Dict[str, set[str]] = defaultdict(set)
+    for from_email, subject, label in rows:
+        addr = parseaddr(from_email or "")[1].strip().lower()
+        if "@" in addr:
+            domain = addr.rsplit("@", 1)[1]
+            by_addr[addr][label] += 1
+            by_domain[domain][label] += 1
+            domain_addrs[domain].add(addr)
+        subj = " ".join((subject or "").lower().split())
+        if len(subj.split()) >= 2:
+            by_subject[subj][label] += 1
+            subject_addrs[subj].add(addr)
+
+    opts = dict(min_support=min_support, min_share=min_share, allowed=allowed)
+    out: list[FilterCandidate] = []
+    covered: Dict[str, JobLabel] = {}          # address -> label of the sender filter covering it
+
+    for domain, counts in by_domain.items():
+        hit = _top(counts, **opts)
+        if not hit or is_shared_domain(domain) or len(domain_addrs[domain]) < 2:
+            continue
+        # the domain total can clear min_share while one address is mostly something else
+        per_addr = [_top(by_addr[addr], **dict(opts, min_support=1)) for addr in domain_addrs[domain]]
+        if all(a is not None and a[0] == hit[0] for a in per_addr):
+            out.append(FilterCandidate("from", f"@{domain}", *hit))
+            covered.update((addr, hit[0]) for addr in domain_addrs[domain])
+
+    for addr, counts in by_addr.items():
+        hit = _top(counts, **opts)
+        if hit and addr not in covered and not is_relay_domain(addr.rsplit("@", 1)[1]):
+            out.append(FilterCandidate("from", addr, *hit))
+            covered[addr] = hit[0]
+
+    for subj, counts in by_subject.items():
+        hit = _top(counts, **opts)
+        if not hit or len(subject_addrs[subj]) < 2:
+            continue
+        if any(is_relay_domain(addr.rsplit("@", 1)[1]) for addr in subject_addrs[subj] if "@" in addr):
+            continue  # ATS / job-board templates: the same subject also carries rejections
+        if all(covered.get(addr) == hit[0] for addr in subject_addrs[subj]):
+            continue  # sender filters already catch all of it
+        out.append(FilterCandidate("subject", subj, *hit))
+
+    for rule in PUSHDOWN_RULES:
+        (n,) = store.conn.execute(
+            "SELECT COUNT(*) FROM messages WHERE source = 'pushdown' AND rule = ? AND processed_at >= ?",
+            (rule.name, since),
+        ).fetchone()
+        if n >= min_support and rule.label in allowed:
+            out.append(FilterCandidate("query", rule.q, rule.label, n, 1.0))
+
+    out.sort(key=lambda c: c.support, reverse=True)
+    return out
+
+
+def _http_status(ex: Exception) -> Optional[int]:
+    # googleapiclient HttpError: ex.resp.status; the bench fake: ex.status
+    status = getattr(getattr(ex, "resp", None), "status", None) or getattr(ex, "status", None)
+    return int(status) if status is not None else None
+
+
+class GmailFilters:
+    """
+    Install learned mappings as native Gmail filters (label + PROCESSED, mark read like the
+    pipeline), so Gmail labels that mail on arrival and the agent skips it. Every filter this
+    creates is recorded (state store) by install batch, which is what rollback() deletes.
+    """
+
+    def __init__(self, service, store: StateStore, *, log: Callable[[str], None] = print):
+        self.service = service
+        self.store = store
+        self.log = log
+        self.store.conn.executescript(_SCHEMA)
+        self.store.conn.commit()
+
+    def existing(self) -> list[Dict[str, Any]]:
+        with metrics.span("gmail_request", method="settings.filters.list"):
+            resp = self.service.users().settings().filters().list(userId="me").execute()
+        return resp.get("filter", []) or []
+
+    def plan(self, candidates: list[FilterCandidate]) -> tuple[list[FilterCandidate], list[tuple[FilterCandidate, str]]]:
+        """Split candidates into (new, [(duplicate, reason)]) against the account's current filters."""
+        froms: Dict[str, Dict[str, Any]] = {}
+        subjects: Dict[str, Dict[str, Any]] = {}
+        queries: Dict[str, Dict[str, Any]] = {}
+        for f in self.existing():
+            crit = f.get("criteria", {})
+            if crit.get("from"):
+                froms[crit["from"].strip().lower()] = f
+            if crit.get("subject"):
+                subjects[crit["subject"].strip().strip('"').lower()] = f
+            if crit.get("query") and not (crit.get("from") or crit.get("subject")):
+                queries[crit["query"].strip()] = f
+
+        new, dupes = [], []
+        for c in candidates:
+            if c.kind == "subject":
+                match = subjects.get(c.value)
+            elif c.kind == "query":
+                match = queries.get(c.criteria()["query"])
+            else:
+                domain = c.value.rsplit("@", 1)[1]
+                match = froms.get(c.value) or froms.get(f"@{domain}") or froms.get(domain)
+            if match is None:
+                new.append(c)
+            else:
+                dupes.append((c, f"covered by filter {match.get('id')}"))
+        return new, dupes
+
+    def _next_batch(self) -> int:
+        row = self.store.conn.execute("SELECT MAX(batch) FROM gmail_filters").fetchone()
+        return (row[0] or 0) + 1
+
+    def install(self, candidates: list[FilterCandidate], *, dry_run: bool = False) -> list[FilterCandidate]:
+        """Create filters for the candidates not already covered. Returns the ones created (or planned)."""
+        new, dupes = self.plan(candidates)
+        for c, reason in dupes:
+            self.log(f"⏭️ {c.describe()}: {reason}")
+        if dry_run:
+            for c in new:
+                self.log(f"📝 would create {c.describe()}")
+            return new
+
+        label_ids = ensure_labels(self.service, JOB_LABELS + [PROCESSED_LABEL])
+        batch = self._next_batch()
+        for c in new:
+            body = {"criteria": c.criteria(), "action": c.action(label_ids)}
+            try:
+                with metrics.span("gmail_request", method="settings.filters.create"):
+                    created = self.service.users().settings().filters().create(userId="me", body=body).execute()
+            except Exception as ex:
+                if _http_status(ex) == 403:
+                    raise RuntimeError(
+                        f"Gmail refused to create a filter ({ex}): the token needs the {FILTERS_SCOPE} scope, "
+                        "re-run scripts/auth_gmail_local.py"
+                    ) from ex
+                raise
+            self.store.conn.execute(
+                "INSERT INTO gmail_filters (filter_id, batch, kind, value, label, support, share, installed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (created["id"], batch, c.kind, c.value, c.label.value, c.support, c.share, time.time()),
+            )
+            self.store.conn.commit()   # per filter: a failure halfway still leaves a complete rollback record
+            self.log(f"✅ created {c.describe()} [{created['id']}]")
+        return new
+
+    def installed(self, *, active_only: bool = True) -> list[tuple]:
+        """(filter_id, batch, kind, value, label, support, share) created by install()."""
+        where = " WHERE removed_at IS NULL" if active_only else ""
+        return self.store.conn.execute(
+            "SELECT filter_id, batch, kind, value, label, support, share FROM gmail_filters"
+            f"{where} ORDER BY batch, installed_at"
+        ).fetchall()
+
+    def rollback(self, *, batch: Optional[int] = None, everything: bool = False) -> int:
+        """
+        Delete the filters of one install batch (default: the latest), or all of them. Returns how many.
+        A filter Gmail refuses to delete stays recorded as active, so the next rollback retries it.
+        """
+        active = self.installed()
+        if not active:
+            return 0
+        if not everything:
+            batch = batch if batch is not None else max(r[1] for r in active)
+            active = [r for r in active if r[1] == batch]
+
+        removed = 0
+        for i, (filter_id, _, kind, value, label, _, _) in enumerate(active):
+            try:
+                with metrics.span("gmail_request", method="settings.filters.delete"):
+                    self.service.users().settings().filters().delete(userId="me", id=filter_id).execute()
+            except Exception as ex:
+                status = _http_status(ex)
+                if status == 403:
+                    # every delete fails the same way: keep the rest recorded for the next rollback
+                    self.log(f"❌ Gmail refused to delete filters ({ex}): {len(active) - i} left installed, "
+                             f"the token needs the {FILTERS_SCOPE} scope (re-run scripts/auth_gmail_local.py)")
+                    break
+                if status != 404:
+                    self.log(f"❌ could not remove {kind}:{value} -> {label} [{filter_id}]: {ex}")
+                    continue
+                # already deleted in Gmail by hand
+            self.store.conn.execute(
+                "UPDATE gmail_filters SET removed_at = ? WHERE filter_id = ?", (time.time(), filter_id)
+            )
+            self.store.conn.commit()
+            removed += 1
+            self.log(f"🗑️ removed {kind}:{value} -> {label} [{filter_id}]")
+        return removed
+
+
+def filter_options_from_env() -> Dict[str, Any]:
+    return {
+        "min_support": int(os.getenv("FILTER_MIN_SUPPORT", "10")),
+        "min_share": float(os.getenv("FILTER_MIN_SHARE", "0.98")),
+        "lookback_days": float(os.getenv("FILTER_LOOKBACK_DAYS", "90")),
+    }
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import queue
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Optional
+
+from email_agent.llm.ollama_client import OllamaClient
+from email_agent.metrics import metrics
+from email_agent.pipeline.classify import Decision, LLMJob
+from email_agent.pipeline.reputation import SenderReputation, sender_keys
+from email_agent.pipeline.rules import _ASSESSMENT_PLATFORM_RE, _ASSESSMENT_RE, _INTERVIEW_RE
+from email_agent.schemas import JobLabel
+
+# Words that usually mean someone is waiting on us, but that the rules don't key on
+_URGENT_RE = re.compile(
+    r"\bavailab(le|ility)\b|\btime ?slots?\b|\bnext steps?\b|\bphone screen\b|\bon-?site\b|\bhiring manager\b"
+    r"|\brecruiter\b|\bdeadline\b|\bexpires?\b|\bwithin \d+ (hours|days)\b|\basap\b|\burgent\b|\boffer letter\b"
+)
+# Bulk / automated mail: fine to label last
+_BULK_RE = re.compile(r"\bnewsletter\b|\bdigest\b|\bwebinar\b|\bweekly\b|\bno-?reply\b|\bnotifications?@")
+
+_URGENT_LABELS = {JobLabel.INTERVIEWS.value, JobLabel.ASSESSMENTS.value, JobLabel.IN_PROCESS.value}
+_BULK_LABELS = {
+    JobLabel.JOB_ALERTS.value, JobLabel.ADVERTISEMENTS.value,
+    JobLabel.RECOMMENDATIONS.value, JobLabel.OTHERS.value,
+}
+
+HIGH, NORMAL, LOW = "high", "normal", "low"
+_RANK = {HIGH: 0, NORMAL: 1, LOW: 2}
+
+
+@dataclass
+class Priority:
+    level: str          # high | normal | low
+    score: float
+    reasons: list[str]
+    ts: float           # Date header (epoch seconds): newer first within a level
+
+
+def _timestamp(date_header: str) -> float:
+    try:
+        return parsedate_to_datetime(date_header).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return 0.0
+
+
+def predict_priority(e, text: str, reputation: Optional[SenderReputation] = None) -> Priority:
+    """
+    Cheap urgency guess for mail headed to the LLM: no Gmail or model calls, a few regexes
+    and at most two sender_stats reads.
+
+    text: what the LLM will see (snippet, plus the body when it was fetched).
+    """
+    score = 0.0
+    reasons: list[str] = []
+    haystack = f"{e.subject}\n{text}".lower()
+
+    # partial rule matches: the interview / assessment rules didn't fire (or the mail would not
+    # be here), but their keywords did
+    if _INTERVIEW_RE.search(haystack) or _ASSESSMENT_RE.search(haystack) or _ASSESSMENT_PLATFORM_RE.search(haystack):
+        score += 2.0
+        reasons.append("rule_keywords")
+    if _URGENT_RE.search(haystack):
+        score += 1.5
+        reasons.append("urgent_keywords")
+    if _BULK_RE.search(f"{haystack}\n{e.from_email.lower()}"):
+        score -= 1.5
+        reasons.append("bulk")
+
+    # sender history: how often this address (else domain) sent stage-moving mail vs bulk
+    if reputation is not None:
+        for key in sender_keys(e.from_email):
+            dist = reputation.distribution(key)
+            support = sum(dist.values())
+            if support < 1.0:
+                continue
+            urgent = sum(w for label, w in dist.items() if label in _URGENT_LABELS) / support
+            bulk = sum(w for label, w in dist.items() if label in _BULK_LABELS) / support
+            score += 2.0 * urgent - 1.5 * bulk
+            reasons.append(f"sender {key} urgent={urgent:.0%} bulk={bulk:.0%}")
+            break
+
+    level = HIGH if score >= 2.0 else LOW if score <= -1.0 else NORMAL
+    return Priority(level=level, score=score, reasons=reasons, ts=_timestamp(e.date))
+
+
+@dataclass
+class ScheduledJob:
+    job: LLMJob
+    priority: Priority
+    on_done: Callable[[Decision, float], None]          # (decision, llm seconds), called on the caller's thread
+    on_error: Callable[[Exception], None]
+    sender: Optional[str] = None        # set when sender reputation may still settle the job while it waits
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class LLMScheduler:
+    """
+    Priority queue in front of the LLM tier.
+
+    Worker threads take the most urgent job first (then the newest within a level) and run
+    only the model call; results come back through poll()/drain() on the caller's thread,
+    which keeps every Gmail and state-store call there. So while the LLM works through the
+    queue, the caller keeps triaging (fetch + reputation + rules) and an interview invite
+    listed after a pile of newsletters still reaches the model first.
+    """
+
+    def __init__(self, client: OllamaClient, *, workers: int = 1):
+        self.client = client
+        self._heap: list[tuple[int, float, int, ScheduledJob]] = []
+        self._seq = itertools.count()
+        self._cv = threading.Condition()
+        self._done: "queue.Queue[tuple[ScheduledJob, Any, float]]" = queue.Queue()
+        self._pending = 0
+        self._closed = False
+        self._threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(max(1, workers))]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, item: ScheduledJob) -> None:
+        p = item.priority
+        with self._cv:
+            heapq.heappush(self._heap, (_RANK[p.level], -p.ts, next(self._seq), item))
+            self._pending += 1
+            self._cv.notify()
+        metrics.inc("llm_scheduled", priority=p.level)
+
+    def take(self, predicate: Callable[[ScheduledJob], bool]) -> list[ScheduledJob]:
+        """Remove and return the queued (not yet running) jobs matching predicate."""
+        with self._cv:
+            taken = [entry[-1] for entry in self._heap if predicate(entry[-1])]
+            if taken:
+                # by identity: `in` on the list would run dataclass __eq__ down into every LLMJob
+                taken_ids = {id(item) for item in taken}
+                self._heap = [entry for entry in self._heap if id(entry[-1]) not in taken_ids]
+                heapq.heapify(self._heap)
+                self._pending -= len(taken)
+        return taken
+
+    def _worker(self) -> None:
+        while True:
+            with self._cv:
+                while not self._heap and not self._closed:
+                    self._cv.wait()
+                if not self._heap:
+                    return
+                _, _, _, item = heapq.heappop(self._heap)
+            metrics.observe("llm_queue_wait", time.perf_counter() - item.enqueued_at, priority=item.priority.level)
+            t0 = time.perf_counter()
+            try:
+                result: Any = item.job.run(self.client)
+            except Exception as ex:
+                result = ex
+            self._done.put((item, result, time.perf_counter() - t0))
+
+    def _deliver(self, item: ScheduledJob, result: Any, llm_s: float) -> None:
+        self._pending -= 1
+        if isinstance(result, Exception):
+            item.on_error(result)
+        else:
+            item.on_done(result, llm_s)
+
+    @property
+    def pending(self) -> int:
+        """Jobs submitted and not yet delivered (queued, running or finished but not polled)."""
+        return self._pending
+
+    def poll(self) -> int:
+        """Hand finished jobs to their callbacks without waiting. Returns how many."""
+        n = 0
+        while True:
+            try:
+                item, result, llm_s = self._done.get_nowait()
+            except queue.Empty:
+                return n
+            self._deliver(item, result, llm_s)
+            n += 1
+
+    def drain(self) -> None:
+        """Wait for every submitted job and deliver it."""
+        while self._pending:
+            item, result, llm_s = self._done.get()
+            self._deliver(item, result, llm_s)
+
+    def close(self) -> None:
+        """Stop the workers. Jobs still queued are dropped (their messages stay unprocessed)."""
+        with self._cv:
+            self._closed = True
+            self._heap.clear()
+            self._cv.notify_all()
+        for t in self._threads:
+            t.join()
+
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from email_agent.config import PROCESSED_LABEL
+from email_agent.schemas import JobLabel
+
+# Mail that mentions a stage in the subject, or a stage change anywhere in the text,
+# always goes through the per-message pipeline
+_STAGE_TERMS = "{interview assessment application applying candidacy offer unfortunately regret recruiter}"
+_REJECTION_TERMS = (
+    '{unfortunately "regret to inform" "not selected" "not to move forward" "not be moving forward"'
+    ' "other candidates" "other applicants" "no longer under consideration"}'
+)
+_PROGRESS_TERMS = '{interview assessment "next steps" "offer letter" availability}'
+
+# Promotions also holds job-board digests and alerts: only mail with the ad rule's terms and
+# none of the job ones, from anyone but a job board, is an advertisement
+_AD_TERMS = '{unsubscribe promo promotion deal discount sale "% off"}'
+_JOB_TERMS = "{job jobs role roles hiring career careers recruiting}"
+_JOB_BOARD_SENDERS = "{linkedin.com indeed.com glassdoor.com ziprecruiter.com monster.com}"
+
+
+def stage_guard(label: JobLabel) -> str:
+    """
+    Search terms that keep a label-on-search (pushdown rule, Gmail filter) off mail that may be
+    at another stage than `label`, even from a sender / category that is always `label`:
+    those messages are left to the per-message pipeline.
+    """
+    if label == JobLabel.REJECTED:
+        return f"-{_PROGRESS_TERMS}"
+    if label == JobLabel.APPLIED:
+        return f"-{_PROGRESS_TERMS} -{_REJECTION_TERMS}"
+    return f"-subject:{_STAGE_TERMS} -{_PROGRESS_TERMS} -{_REJECTION_TERMS}"
+
+
+@dataclass(frozen=True)
+class PushdownRule:
+    """A rule Gmail's search index can evaluate: every message matching `q` gets `label`."""
+    name: str
+    label: JobLabel
+    q: str
+
+    def query(self, scope: Optional[str] = None) -> str:
+        """The rule's search, minus stage-looking mail and anything already PROCESSED."""
+        parts = [self.q, stage_guard(self.label), f"-label:{PROCESSED_LABEL}"]
+        if scope:
+            parts.append(scope)
+        return " ".join(parts)
+
+
+# High-precision subset of rules.RULES, restated as sender / subject / category searches.
+# Order is precedence: a message labeled by one rule carries PROCESSED before the next is listed.
+PUSHDOWN_RULES: list[PushdownRule] = [
+    PushdownRule(
+        "otp", JobLabel.OTP_SECURITY,
+        'subject:{"verification code" "security code" passcode "one-time password" "one-time code"}',
+    ),
+    PushdownRule(
+        "job_alerts_sender", JobLabel.JOB_ALERTS,
+        "from:{jobalerts-noreply@linkedin.com jobs-noreply@linkedin.com}",
+    ),
+    PushdownRule(
+        "job_alerts", JobLabel.JOB_ALERTS,
+        'subject:{"job alert" "jobs you may like" "recommended jobs" "job matches"}',
+    ),
+    PushdownRule(
+        "advertisements", JobLabel.ADVERTISEMENTS,
+        f"category:promotions {_AD_TERMS} -{_JOB_TERMS} -from:{_JOB_BOARD_SENDERS}",
+    ),
+]
+
+
+def pushdown_rules_from_env() -> list[PushdownRule]:
+    """PUSHDOWN_RULES: comma-separated rule names (default: all, empty: pre-pass off)."""
+    names = os.getenv("PUSHDOWN_RULES")
+    if names is None:
+        return list(PUSHDOWN_RULES)
+    wanted = {n.strip() for n in names.split(",") if n.strip()}
+    return [r for r in PUSHDOWN_RULES if r.name in wanted]
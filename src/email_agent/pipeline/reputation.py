@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import math
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from email.utils import parseaddr
+from typing import Optional
+
+from email_agent.schemas import JobLabel
+from email_agent.state.store import StateStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sender_stats (
+    sender_key TEXT NOT NULL,          -- "addr:jobs-noreply@linkedin.com" | "domain:linkedin.com"
+    label      TEXT NOT NULL,
+    weight     REAL NOT NULL,          -- decayed count as of updated_at
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (sender_key, label)
+) WITHOUT ROWID;
+"""
+
+# Decisions that were not made on the message's own content are not fed back
+# (the index would just reinforce itself / thread siblings would inflate one sender)
+_NO_FEEDBACK_SOURCES = {"reputation", "thread"}
+
+
+@dataclass
+class SenderVerdict:
+    label: JobLabel
+    key: str
+    share: float        # fraction of (decayed) weight on the top label
+    support: float      # total decayed weight for this key
+
+
+# Domains that send for many unrelated people / employers: their domain-level history says
+# nothing about a new address (a new ATS tenant, a stranger on gmail.com)
+_FREEMAIL_DOMAINS = {
+    "gmail.com", "googlemail.com", "outlook.com", "hotmail.com", "live.com", "yahoo.com", "icloud.com",
+    "proton.me", "protonmail.com", "aol.com",
+}
+# applicant tracking systems and job boards: one address relays confirmations, rejections and
+# interview invites for many employers, so neither its domain nor the address itself predicts a label
+_ATS_DOMAINS = {
+    "greenhouse.io", "greenhouse-mail.io", "lever.co", "myworkday.com", "workday.com", "smartrecruiters.com",
+    "icims.com", "taleo.net", "jobvite.com", "ashbyhq.com", "successfactors.com", "bamboohr.com",
+    "workablemail.com", "workable.com", "recruitee.com", "breezy.hr",
+}
+_JOB_BOARD_DOMAINS = {"linkedin.com", "indeed.com"}
+
+
+def _in(domain: str, domains: set[str]) -> bool:
+    domain = domain.lower()
+    return any(domain == d or domain.endswith("." + d) for d in domains)
+
+
+def is_relay_domain(domain: str) -> bool:
+    """ATS / job-board domain (mail sent on behalf of employers), including tenant subdomains (acme.myworkday.com)."""
+    return _in(domain, _ATS_DOMAINS | _JOB_BOARD_DOMAINS)
+
+
+def is_shared_domain(domain: str) -> bool:
+    """Freemail / ATS / job-board domain, including subdomains."""
+    return _in(domain, _FREEMAIL_DOMAINS | _ATS_DOMAINS | _JOB_BOARD_DOMAINS)
+
+
+def sender_keys(from_email: str) -> list[str]:
+    """
+    Most specific first: full address, then domain (unless the domain is shared).
+    None for ATS / job-board senders: the Gmail filter miner skips them for the same reason.
+    """
+    addr = parseaddr(from_email or "")[1].strip().lower()
+    if "@" not in addr:
+        return []
+    domain = addr.rsplit("@", 1)[1]
+    if is_relay_domain(domain):
+        return []
+    return [f"addr:{addr}"] if is_shared_domain(domain) else [f"addr:{addr}", f"domain:{domain}"]
+
+
+class SenderReputation:
+    """
+    Sender address / domain -> label distribution, learned from every pipeline decision.
+
+    Counts decay exponentially (half-life in days) so a sender that changes what it
+    sends (e.g. ATS moving from confirmations to rejections) loses confidence.
+    Lives in the state store's SQLite file.
+    """
+
+    def __init__(
+        self,
+        store: StateStore,
+        *,
+        half_life_days: float = 30.0,
+        min_share: float = 0.95,
+        min_support: float = 5.0,
+    ):
+        self.conn = store.conn
+        self.half_life_s = half_life_days * 86400
+        self.min_share = min_share
+        self.min_support = min_support
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+        try:
+            self.conn.execute("SELECT power(0.5, 1)")
+        except sqlite3.OperationalError:     # SQLite built without the math functions
+            self.conn.create_function("power", 2, math.pow, deterministic=True)
+
+    @classmethod
+    def from_env(cls, store: StateStore) -> "SenderReputation":
+        return cls(
+            store,
+            half_life_days=float(os.getenv("REPUTATION_HALF_LIFE_DAYS", "30")),
+            min_share=float(os.getenv("REPUTATION_MIN_SHARE", "0.95")),
+            min_support=float(os.getenv("REPUTATION_MIN_SUPPORT", "5")),
+        )
+
+    def _decay(self, weight: float, updated_at: float, now: float) -> float:
+        return weight * 0.5 ** (max(0.0, now - updated_at) / self.half_life_s)
+
+    def observe(self, from_email: str, label: JobLabel | str, source: str = "") -> None:
+        if source in _NO_FEEDBACK_SOURCES:
+            return
+        label_value = label.value if isinstance(label, JobLabel) else label
+        now = time.time()
+        # decay + increment in one upsert: backfill workers write the same rows from their own
+        # connections, and a SELECT-then-write would lose concurrent increments
+        self.conn.executemany(
+            "INSERT INTO sender_stats (sender_key, label, weight, updated_at) VALUES (?, ?, 1.0, ?)"
+            " ON CONFLICT (sender_key, label) DO UPDATE SET"
+            " weight = weight * power(0.5, MAX(0.0, excluded.updated_at - updated_at) / ?) + 1.0,"
+            " updated_at = MAX(updated_at, excluded.updated_at)",
+            [(key, label_value, now, self.half_life_s) for key in sender_keys(from_email)],
+        )
+        self.conn.commit()
+
+    def distribution(self, key: str) -> dict[str, float]:
+        now = time.time()
+        rows = self.conn.execute(
+            "SELECT label, weight, updated_at FROM sender_stats WHERE sender_key = ?", (key,)
+        )
+        return {label: self._decay(w, ts, now) for label, w, ts in rows}
+
+    def predict(self, from_email: str) -> Optional[SenderVerdict]:
+        """Label for this sender if its history is confident enough, else None."""
+        for key in sender_keys(from_email):
+            dist = self.distribution(key)
+            support = sum(dist.values())
+            if support < self.min_support:
+                continue
+            label, weight = max(dist.items(), key=lambda kv: kv[1])
+            share = weight / support
+            if share >= self.min_share and label in JobLabel._value2member_map_:
+                return SenderVerdict(label=JobLabel(label), key=key, share=share, support=support)
+            # a well-known but mixed address: don't let its domain overrule that
+            return None
+        return None
+
+    def prune(self, *, min_weight: float = 0.05) -> int:
+        """Drop entries that have decayed to nothing. Returns rows removed."""
+        now = time.time()
+        rows = self.conn.execute("SELECT sender_key, label, weight, updated_at FROM sender_stats").fetchall()
+        dead = [(k, l) for k, l, w, ts in rows if self._decay(w, ts, now) < min_weight]
+        self.conn.executemany("DELETE FROM sender_stats WHERE sender_key = ? AND label = ?", dead)
+        self.conn.commit()
+        return len(dead)
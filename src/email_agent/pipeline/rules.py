@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import re
+from typing import Callable
+
+from email_agent.metrics import metrics
+from email_agent.schemas import JobLabel
+
+# Advertisements / promotions / marketing
+_ADS_RE = re.compile(r"\bunsubscribe\b|\bpromo\b|\bpromotion\b|\bdeal\b|\boffer\b|\bdiscount\b|\bsale\b|\b% off\b|\bvaibhav sisinity\b|\bextern\b")
+
+# Job alerts (LinkedIn/Indeed/company alerts)
+_JOB_ALERTS_RE = re.compile(r"\bjob alert\b|\bnew job(s)?\b|\bjobs you may like\b|\brecommended jobs\b|\bjob matches\b")
+
+# OTP/security codes
+_OTP_RE = re.compile(r"\botp\b|\bverification code\b|\bsecurity code\b|\bpasscode\b|\bone[- ]time\b")
+
+# Rejection
+_REJECTION_RE = re.compile(r"\bunfortunately\b|\bregret to inform\b|\bwe regret\b|\bnot selected\b|\bdeclined\b|\bmoving forward with other candidates?\b|\bnot to move forward\b")
+
+# Interview
+_INTERVIEW_RE = re.compile(r"\binterview\b|\bschedule\b|\bcalendly\b|\bzoom\b|\bgoogle meet\b|\bteams meeting\b")
+
+# Applied/confirmation
+_APPLIED_RE = re.compile(
+    r"\bwe (just )?(have )?received your (application|resume)\b"
+    r"|\bconfirm(ing)? that we (have )?received your (application|resume)\b"
+    r"|\bthank you for (your )?interest\b"
+    r"|\bthanks for (your )?interest\b"
+    r"|\bthanks for applying\b"
+    r"|\bwe received your application\b"
+    r"|\byour application\b.*\b(received|submitted)\b"
+)
+
+# Assessment (invite + action OR known platform)
+_ASSESSMENT_RE = re.compile(r"\b(assessment|coding challenge|skill assessment)\b")
+_ASSESSMENT_ACTION_RE = re.compile(r"\b(start|click|begin|complete|link|timed)\b")
+_ASSESSMENT_PLATFORM_RE = re.compile(r"\bhackerrank\b|\bshl\b|\bcodility\b|\bkarat\b|\bcode(signal)?\b")
+
+# Recommendations (role recommendations / similar jobs)
+_RECOMMENDATIONS_RE = re.compile(r"\brecommended for you\b|\byou might be interested\b|\bsuggested (role|job|position)\b|\bsimilar jobs\b")
+
+
+def _assessment(text: str) -> bool:
+    return bool(
+        (_ASSESSMENT_RE.search(text) and _ASSESSMENT_ACTION_RE.search(text))
+        or _ASSESSMENT_PLATFORM_RE.search(text)
+    )
+
+
+# Evaluated in order; first match wins.
+RULES: list[tuple[str, JobLabel, Callable[[str], object]]] = [
+    ("advertisements", JobLabel.ADVERTISEMENTS, _ADS_RE.search),
+    ("job_alerts", JobLabel.JOB_ALERTS, _JOB_ALERTS_RE.search),
+    ("otp", JobLabel.OTP_SECURITY, _OTP_RE.search),
+    ("rejection", JobLabel.REJECTED, _REJECTION_RE.search),
+    ("interview", JobLabel.INTERVIEWS, _INTERVIEW_RE.search),
+    ("applied", JobLabel.APPLIED, _APPLIED_RE.search),
+    ("assessment", JobLabel.ASSESSMENTS, _assessment),
+    ("recommendations", JobLabel.RECOMMENDATIONS, _RECOMMENDATIONS_RE.search),
+]
+
+
+def match_rule(subject: str, snippet: str, from_email: str) -> tuple[str, JobLabel] | None:
+    """Return (rule_name, label) for the first rule that fires."""
+    text = f"{subject}\n{snippet}\n{from_email}".lower()
+
+    if not metrics.enabled:
+        for name, label, predicate in RULES:
+            if predicate(text):
+                return name, label
+        return None
+
+    for name, label, predicate in RULES:
+        with metrics.span("rule", rule=name):
+            fired = predicate(text)
+        if fired:
+            metrics.inc("rule_hits", rule=name)
+            return name, label
+    return None
+
+def short_circuit_label(subject: str, snippet: str, from_email: str) -> JobLabel | None:
+    hit = match_rule(subject, snippet, from_email)
+    return hit[1] if hit else None
+
+def needs_body_fetch(subject: str, snippet: str) -> bool:
+    s = f"{subject}\n{snippet}".lower()
+    # subjects/templates where snippet often hides the outcome
+    return bool(re.search(r"\b(status|update|interest|next step|moving forward)\b", s))
@@ -0,0 +1,448 @@
+from __future__ import annotations
+
+import itertools
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from email_agent.config import JOB_LABELS, PROCESSED_LABEL
+from email_agent.gmail.fetch import fetch_thread, iter_message_refs
+from email_agent.gmail.fetch_meta import fetch_email_meta
+from email_agent.gmail.labels import ensure_labels, apply_labels, batch_modify
+from email_agent.gmail.quota import QuotaExceeded
+from email_agent.llm.ollama_client import OllamaClient
+from email_agent.metrics import metrics
+from email_agent.pipeline.classify import Decision, LLMJob, classify_email, reputation_decision
+from email_agent.pipeline.rules import needs_body_fetch
+from email_agent.pipeline.priority import LLMScheduler, ScheduledJob, predict_priority
+from email_agent.pipeline.pushdown import PushdownRule, pushdown_rules_from_env
+from email_agent.pipeline.reputation import SenderReputation, sender_keys
+from email_agent.pipeline.threads import ThreadDecision, classify_thread, prior_thread_label
+from email_agent.schemas import JobLabel
+from email_agent.state.store import StateStore
+
+
+@dataclass
+class RunSummary:
+    checked: int = 0
+    labeled: int = 0
+    skipped: int = 0
+    errors: int = 0
+    # per-message details grow with the mailbox: kept only when detailed (benchmarks, replays)
+    detailed: bool = False
+    latencies_ms: list[float] = field(default_factory=list)   # one entry per classified email / thread
+    decisions: dict[str, str] = field(default_factory=dict)    # message_id -> label
+    label_times_s: dict[str, float] = field(default_factory=dict)  # message_id -> seconds from run start to labeled
+    started_at: float = field(default_factory=time.perf_counter, repr=False)
+    # labeled by the pushdown pre-pass and not yet reached by process(): at most one listed page
+    prelabeled: set[str] = field(default_factory=set, repr=False)
+
+    def record_labels(self, msg_ids: list[str], label: str) -> float:
+        """Seconds since the run started; remembered per message when detailed."""
+        labeled_at = time.perf_counter() - self.started_at
+        if self.detailed:
+            for msg_id in msg_ids:
+                self.decisions[msg_id] = label
+                self.label_times_s[msg_id] = labeled_at
+        return labeled_at
+
+    def record_latency(self, latency_ms: float) -> None:
+        if self.detailed:
+            self.latencies_ms.append(latency_ms)
+
+
+def debug_others(email, combined_text, log: Callable[[str], None] = print):
+    log("\n" + "=" * 80)
+    log("⚠️ DEBUG: CLASSIFIED AS OTHERS")
+    log(f"From   : {email.from_email}")
+    log(f"Subject: {email.subject}")
+    log("----- TEXT SENT TO CLASSIFIER -----")
+    log(combined_text)
+    log("=" * 80 + "\n")
+
+
+class LabelPipeline:
+    """
+    list -> skip known (state store) -> classify -> label + PROCESSED -> record.
+
+    One instance per mailbox/service. Shared by the CLI script, benchmarks and tools
+    that drive the pipeline from somewhere other than a live inbox.
+
+    Mail that reaches the LLM tier goes through an LLMScheduler (llm_workers threads, env
+    LLM_WORKERS, default 1): likely interview / assessment mail is sent to the model first
+    while the rest of the batch keeps being triaged. llm_workers=0 calls the model inline.
+
+    run() starts with a pushdown pre-pass (pushdown_rules, env PUSHDOWN_RULES): label-only
+    mail that a Gmail search can identify is labeled in bulk before any message is fetched.
+    """
+
+    def __init__(
+        self,
+        service,
+        *,
+        store: StateStore,
+        client: OllamaClient,
+        reputation: Optional[SenderReputation] = None,
+        log: Callable[[str], None] = print,
+        llm_workers: Optional[int] = None,
+        pushdown_rules: Optional[list[PushdownRule]] = None,
+    ):
+        self.service = service
+        self.store = store
+        self.client = client
+        self.reputation = reputation
+        self.log = log
+        self.llm_workers = int(os.getenv("LLM_WORKERS", "1")) if llm_workers is None else llm_workers
+        self._scheduler: Optional[LLMScheduler] = None
+        self.pushdown_rules = pushdown_rules_from_env() if pushdown_rules is None else pushdown_rules
+
+        # Ensure labels exist in Gmail
+        self.label_ids = ensure_labels(service, JOB_LABELS + [PROCESSED_LABEL])
+        self.processed_label_id = self.label_ids[PROCESSED_LABEL]
+        self.label_names = {v: k for k, v in self.label_ids.items()}
+
+    # ---- entry points ----
+
+    def run(self, *, max_emails: int = 50, thread_mode: bool = False, q: Optional[str] = None,
+            detailed: bool = False) -> RunSummary:
+        """
+        List IDs only, one page (up to 500) at a time: everything the local store already knows
+        about is dropped before any get, and memory holds one page of refs however large
+        max_emails is. detailed: keep per-message decisions / timings in the summary.
+        """
+        summary = RunSummary(detailed=detailed)
+        page_size = max(1, min(max_emails, 500))
+        refs_iter = iter_message_refs(self.service, q, page_size=page_size, limit=max_emails)
+        run_id = self.store.start_run()
+        depth = 0
+        while True:
+            refs = list(itertools.islice(refs_iter, page_size))
+            if not refs:
+                break
+            depth += len(refs)
+            self.prefilter({msg_id for msg_id, _ in refs}, q=q, depth=depth, summary=summary)
+            self.process(refs, thread_mode=thread_mode, run_id=run_id, summary=summary)
+        self.store.finish_run(run_id, checked=summary.checked, labeled=summary.labeled, skipped=summary.skipped)
+        return summary
+
+    def prefilter(self, window: set[str], *, q: Optional[str] = None, depth: int,
+                  summary: Optional[RunSummary] = None) -> RunSummary:
+        """
+        Search-only passes over a listed window, before process():
+        mail labeled on arrival by Gmail filters (install_gmail_filters.py) already carries
+        PROCESSED, so it is marked seen from one list call instead of a metadata get per message;
+        then the pushdown rules label their matches inside the window.
+
+        depth: how far from the newest message of `q` the window reaches (its offset + size):
+        the newest `depth` matches of a search cover every match inside it.
+        """
+        page_size = max(1, min(depth, 500))
+        processed_q = f"label:{PROCESSED_LABEL} {q}" if q else f"label:{PROCESSED_LABEL}"
+        processed = iter_message_refs(self.service, processed_q, page_size=page_size, limit=depth)
+        self.store.mark_seen(msg_id for msg_id, _ in processed if msg_id in window)
+        return self.pushdown(q=q, limit=depth, only=window, summary=summary)
+
+    def process(
+        self,
+        refs: list[tuple[str, str]],
+        *,
+        thread_mode: bool = False,
+        run_id: Optional[int] = None,
+        summary: Optional[RunSummary] = None,
+    ) -> RunSummary:
+        """Process listed (message_id, thread_id) refs."""
+        summary = summary or RunSummary()
+        seen = self.store.seen_ids(msg_id for msg_id, _ in refs)
+
+        scheduler = self._scheduler = LLMScheduler(self.client, workers=self.llm_workers) if self.llm_workers > 0 else None
+        cursor = ""
+        try:
+            if thread_mode:
+                threads: OrderedDict[str, list[str]] = OrderedDict()
+                for msg_id, thread_id in refs:
+                    threads.setdefault(thread_id or msg_id, []).append(msg_id)
+                for cursor, listed in threads.items():
+                    self._process_thread(cursor, listed, seen, summary)
+                    self._item_done(run_id, cursor, summary)
+            else:
+                for cursor, _ in refs:
+                    self._process_message(cursor, seen, summary)
+                    self._item_done(run_id, cursor, summary)
+            if scheduler:
+                # LLM-bound items finish after the loop: the counters only settle here
+                scheduler.drain()
+                self._checkpoint(run_id, cursor, summary)
+        finally:
+            if scheduler:
+                scheduler.close()
+            self._scheduler = None
+
+        return summary
+
+    def pushdown(
+        self,
+        *,
+        q: Optional[str] = None,
+        limit: Optional[int] = None,
+        only: Optional[set[str]] = None,
+        summary: Optional[RunSummary] = None,
+    ) -> RunSummary:
+        """
+        Label mail matched by the pushdown rules straight from Gmail search results:
+        messages.list (500 IDs per call) + batchModify (1000 per call), no get, no rules, no LLM.
+        Decisions go to the state store, so the per-message pass skips them without a get.
+
+        q: scope (e.g. a backfill shard's date range); limit: max messages listed per rule;
+        only: label just these IDs (the window a run listed), ignore other matches.
+        """
+        summary = summary or RunSummary()
+        for rule in self.pushdown_rules:
+            add_ids, remove_ids = self._label_change(rule.label)
+            refs = iter_message_refs(self.service, rule.query(q), limit=limit)
+            matched = 0
+            while True:
+                listed = list(itertools.islice(refs, 1000))
+                if not listed:
+                    break
+                chunk = listed if only is None else [ref for ref in listed if ref[0] in only]
+                if not chunk:
+                    continue
+                batch_modify(self.service, [msg_id for msg_id, _ in chunk],
+                             add_label_ids=add_ids, remove_label_ids=remove_ids)
+                self.store.record_bulk(chunk, label=rule.label.value, source="pushdown", rule=rule.name)
+                summary.record_labels([msg_id for msg_id, _ in chunk], rule.label.value)
+                summary.prelabeled.update(msg_id for msg_id, _ in chunk)
+                matched += len(chunk)
+            if matched:
+                summary.labeled += matched
+                metrics.inc("decisions", matched, source="pushdown", label=rule.label.value)
+                self.log(f"✅ Pushdown {rule.name}: {matched} message(s) -> {rule.label.value} (+PROCESSED)")
+        return summary
+
+    # ---- per item ----
+
+    def _process_message(self, msg_id: str, seen: set[str], summary: RunSummary) -> None:
+        summary.checked += 1
+
+        # skip already processed (local state, no Gmail call)
+        if msg_id in seen:
+            if msg_id in summary.prelabeled:  # labeled by this run's pushdown pre-pass
+                summary.prelabeled.discard(msg_id)
+            else:
+                summary.skipped += 1
+            return
+
+        t0 = time.perf_counter()
+        # metadata first: From/Subject/snippet are enough for reputation + snippet rules
+        e = fetch_email_meta(self.service, msg_id)
+
+        # skip already processed (Gmail label, e.g. from before the state store existed)
+        if self.processed_label_id in e.label_ids or PROCESSED_LABEL in e.label_ids:
+            self.store.mark_seen([e.message_id])
+            summary.skipped += 1
+            return
+
+        try:
+            # body is fetched inside only if reputation and snippet rules can't decide
+            decision = classify_email(
+                self.service, e, client=self.client, reputation=self.reputation,
+                defer_llm=self._scheduler is not None,
+            )
+        except QuotaExceeded:
+            raise
+        except Exception as ex:
+            # fail-safe: leave it unprocessed, next run retries it
+            self._classification_failed(f"Classification failed: {e.subject[:70]}", ex, summary)
+            return
+
+        if isinstance(decision, LLMJob):
+            triage_ms = (time.perf_counter() - t0) * 1000
+            self._schedule(
+                decision, f"Classification failed: {e.subject[:70]}", summary,
+                lambda d, llm_s: self._finish_message(e, d, triage_ms + llm_s * 1000, summary),
+            )
+            return
+
+        self._finish_message(e, decision, (time.perf_counter() - t0) * 1000, summary)
+
+    def _finish_message(self, e, decision: Decision, latency_ms: float, summary: RunSummary) -> None:
+        self._apply(e, [e.message_id], decision, summary)
+        summary.record_latency(latency_ms)
+        metrics.observe("email", latency_ms / 1000, mode="message")
+        self._record(e, decision, latency_ms)
+
+    def _process_thread(self, thread_id: str, listed: list[str], seen: set[str], summary: RunSummary) -> None:
+        summary.checked += len(listed)
+        if all(msg_id in seen for msg_id in listed):
+            summary.skipped += sum(1 for msg_id in listed if msg_id not in summary.prelabeled)
+            summary.prelabeled.difference_update(listed)
+            return
+
+        t0 = time.perf_counter()
+        messages = fetch_thread(self.service, thread_id)
+
+        processed = {
+            m.message_id for m in messages
+            if m.message_id in seen or self.processed_label_id in m.label_ids
+        }
+        prior_name = self.store.thread_label(thread_id)
+        prior = (
+            JobLabel(prior_name) if prior_name in JobLabel._value2member_map_
+            else prior_thread_label(messages, processed, self.label_names)
+        )
+
+        try:
+            td = classify_thread(
+                self.service, messages, processed_ids=processed, prior=prior,
+                client=self.client, reputation=self.reputation,
+                defer_llm=self._scheduler is not None,
+            )
+        except QuotaExceeded:
+            raise
+        except Exception as ex:
+            self._classification_failed(f"Thread classification failed: {thread_id}", ex, summary)
+            return
+
+        if td is None:
+            summary.skipped += len(listed)
+            return
+
+        by_id = {m.message_id: m for m in messages}
+        if isinstance(td.decision, LLMJob):
+            triage_ms = (time.perf_counter() - t0) * 1000
+            self._schedule(
+                td.decision, f"Thread classification failed: {thread_id}", summary,
+                lambda d, llm_s: self._finish_thread(by_id, td, d, triage_ms + llm_s * 1000, summary),
+                recheck=prior is None,   # classify_thread only consults reputation for unlabeled threads
+            )
+            return
+
+        self._finish_thread(by_id, td, td.decision, (time.perf_counter() - t0) * 1000, summary)
+
+    def _finish_thread(self, by_id: dict, td: ThreadDecision, decision: Decision, latency_ms: float,
+                       summary: RunSummary) -> None:
+        self._apply(by_id[td.latest_id], td.message_ids, decision, summary)
+        summary.record_latency(latency_ms)
+        metrics.observe("email", latency_ms / 1000, mode="thread")
+        for msg_id in td.message_ids:
+            source = None if msg_id == td.latest_id else "thread"
+            self._record(by_id[msg_id], decision, latency_ms, source=source)
+
+    # ---- LLM scheduling ----
+
+    def _schedule(self, job: LLMJob, failure: str, summary: RunSummary,
+                  finish: Callable[[Decision, float], None], *, recheck: bool = True) -> None:
+        def on_done(decision: Decision, llm_s: float) -> None:
+            finish(decision, llm_s)
+            self._settle_queued(job.e.from_email)
+
+        priority = predict_priority(job.e, job.text, self.reputation)
+        # same as classify_email: risky templates are never settled from the sender alone
+        recheck = recheck and self.reputation is not None and not needs_body_fetch(job.e.subject, job.e.snippet)
+        self._scheduler.submit(ScheduledJob(
+            job=job,
+            priority=priority,
+            on_done=on_done,
+            on_error=lambda ex: self._classification_failed(failure, ex, summary),
+            sender=job.e.from_email if recheck else None,
+        ))
+
+    def _settle_queued(self, from_email: str) -> None:
+        """
+        Inline, an LLM answer feeds the sender's reputation before the next mail from that sender
+        is triaged; deferred, that mail is already queued. So once a sender turns confident,
+        its queued jobs are labeled from reputation instead of waiting for the model.
+        """
+        if self.reputation is None:
+            return
+        keys = set(sender_keys(from_email))
+        decided: dict[int, Decision] = {}
+
+        def settled(item: ScheduledJob) -> bool:
+            if item.sender is None or not keys.intersection(sender_keys(item.sender)):
+                return False
+            decision = reputation_decision(self.reputation, item.sender)
+            if decision:
+                decided[id(item)] = decision
+            return decision is not None
+
+        for item in self._scheduler.take(settled):
+            metrics.inc("llm_avoided", source="reputation")
+            item.on_done(decided[id(item)], 0.0)
+
+    def _classification_failed(self, what: str, ex: Exception, summary: RunSummary) -> None:
+        self.log(f"❌ {what} [{type(ex).__name__}: {ex}]")
+        summary.errors += 1
+        metrics.inc("classification_failures")
+
+    # ---- side effects ----
+
+    def _apply(self, e, msg_ids: list[str], decision: Decision, summary: RunSummary) -> None:
+        """Write the Gmail labels for one decision."""
+        final_label = decision.label
+
+        if final_label == JobLabel.OTHERS:
+            combined_text = f"{e.snippet}".lower()
+            debug_others(e, combined_text, self.log)
+        add_ids, remove_ids = self._label_change(final_label)
+
+        if len(msg_ids) == 1:
+            apply_labels(self.service, msg_ids[0], add_label_ids=add_ids, remove_label_ids=remove_ids)
+        else:
+            batch_modify(self.service, msg_ids, add_label_ids=add_ids, remove_label_ids=remove_ids)
+
+        labeled_at = summary.record_labels(msg_ids, final_label.value)
+        metrics.inc("decisions", len(msg_ids), source=decision.source, label=final_label.value)
+        urgency = "high" if final_label in (JobLabel.INTERVIEWS, JobLabel.ASSESSMENTS) else "other"
+        metrics.observe("time_to_label", labeled_at, urgency=urgency)
+
+        if final_label == JobLabel.OTHERS:
+            self.log(f"⚠️ Unclassified (PROCESSED only): {e.subject[:70]}")
+            summary.skipped += len(msg_ids)
+            return
+
+        # per message, like checked / skipped: in thread mode one decision labels the whole thread
+        summary.labeled += len(msg_ids)
+        suffix = f" x{len(msg_ids)}" if len(msg_ids) > 1 else ""
+        self.log(f"✅ Labeled: {e.subject[:70]} -> {final_label.value} (+PROCESSED){suffix} [{decision.reasoning}]")
+
+    def _label_change(self, label: JobLabel) -> tuple[list[str], list[str]]:
+        """(add, remove) label IDs for a decision."""
+        if label == JobLabel.OTHERS:
+            return [self.processed_label_id], []
+        remove_ids = []
+        if label in (JobLabel.APPLIED, JobLabel.REJECTED, JobLabel.ADVERTISEMENTS):
+            remove_ids.append("UNREAD")  # Gmail system label
+        return [self.label_ids[label.value], self.processed_label_id], remove_ids
+
+    def _record(self, e, decision: Decision, latency_ms: float, source: Optional[str] = None) -> None:
+        if self.reputation is not None:
+            self.reputation.observe(e.from_email, decision.label, source=source or decision.source)
+        self.store.record(
+            message_id=e.message_id,
+            thread_id=e.thread_id,
+            from_email=e.from_email,
+            subject=e.subject,
+            label=decision.label.value,
+            source=source or decision.source,
+            rule=decision.rule,
+            latency_ms=latency_ms,
+            model=decision.model,
+            prompt_version=decision.prompt_version,
+        )
+
+    def _item_done(self, run_id: Optional[int], cursor: str, summary: RunSummary) -> None:
+        if self._scheduler:
+            self._scheduler.poll()
+            if self._scheduler.pending:
+                # an earlier item still waits for the LLM: the checkpoint can't move past it
+                return
+        self._checkpoint(run_id, cursor, summary)
+
+    def _checkpoint(self, run_id: Optional[int], cursor: str, summary: RunSummary) -> None:
+        if run_id is not None:
+            self.store.checkpoint(
+                run_id, cursor, checked=summary.checked, labeled=summary.labeled, skipped=summary.skipped
+            )
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Optional, Union
+
+from email_agent.llm.ollama_client import OllamaClient
+from email_agent.pipeline.classify import Decision, LLMJob, classify_email
+from email_agent.pipeline.reputation import SenderReputation
+from email_agent.schemas import JobLabel
+
+# Cheap "could this move the application somewhere else?" signals, per target stage.
+# A new reply only goes back through rules/LLM if it signals a stage other than the current one.
+_STAGE_SIGNALS: Dict[JobLabel, re.Pattern] = {
+    JobLabel.REJECTED: re.compile(
+        r"\bunfortunately\b|\bregret\b|\bnot (been )?selected\b|\bnot to move forward\b"
+        r"|\bother candidates?\b|\bposition has been filled\b"
+    ),
+    JobLabel.INTERVIEWS: re.compile(
+        r"\binterview\b|\bavailability\b|\bschedul\w*\b|\bcalendly\b|\bzoom\b|\bgoogle meet\b|\bteams meeting\b"
+    ),
+    JobLabel.ASSESSMENTS: re.compile(
+        r"\bassessment\b|\bcoding challenge\b|\btake[- ]home\b|\bhackerrank\b|\bcodility\b|\bcodesignal\b|\bkarat\b"
+    ),
+    JobLabel.IN_PROCESS: re.compile(
+        r"\bnext steps?\b|\bshortlisted\b|\bunder review\b|\bmoving forward\b|\boffer\b"
+    ),
+}
+
+
+@dataclass
+class ThreadDecision:
+    decision: Union[Decision, LLMJob]     # LLMJob when called with defer_llm
+    latest_id: str              # message the decision was made on
+    message_ids: list[str]      # every not-yet-processed message in the thread (gets the label)
+
+
+def could_change_stage(prior: JobLabel, e) -> bool:
+    if prior == JobLabel.OTHERS:
+        return True
+    text = f"{e.subject}\n{e.snippet}\n{e.body_text[:4000]}".lower()
+    return any(
+        stage != prior and pattern.search(text)
+        for stage, pattern in _STAGE_SIGNALS.items()
+    )
+
+
+def prior_thread_label(messages, processed_ids: set[str], label_names: Dict[str, str]) -> Optional[JobLabel]:
+    """
+    Latest job label already on a processed message of this thread (from Gmail labelIds).
+    label_names: Gmail label_id -> label name.
+    """
+    for m in reversed(messages):
+        if m.message_id not in processed_ids:
+            continue
+        for lid in m.label_ids:
+            name = label_names.get(lid)
+            if name and name in JobLabel._value2member_map_:
+                return JobLabel(name)
+    return None
+
+
+def classify_thread(
+    service,
+    messages,
+    *,
+    processed_ids: set[str],
+    prior: Optional[JobLabel],
+    client: OllamaClient,
+    reputation: Optional[SenderReputation] = None,
+    defer_llm: bool = False,
+) -> Optional[ThreadDecision]:
+    """
+    Classify a conversation from its latest inbound message.
+
+    If the thread already has a label and none of the new messages could plausibly
+    change the stage, reuse it (no rules pass on the body, no LLM call).
+    """
+    new = [m for m in messages if m.message_id not in processed_ids]
+    if not new:
+        return None
+
+    # our own replies don't say anything about the stage
+    inbound = [m for m in new if "SENT" not in m.label_ids] or new
+    latest = inbound[-1]
+    new_ids = [m.message_id for m in new]
+
+    if prior is not None and not any(could_change_stage(prior, m) for m in inbound):
+        return ThreadDecision(
+            decision=Decision(label=prior, source="thread", reasoning=f"thread_reuse:{prior.value}"),
+            latest_id=latest.message_id,
+            message_ids=new_ids,
+        )
+
+    context = f"earlier messages were labeled {prior.value}" if prior else None
+    decision = classify_email(
+        service,
+        latest,
+        client=client,
+        body_text=latest.body_text,
+        thread_context=context,
+        # a known sender says nothing about *which* reply this is once the thread has a stage
+        reputation=reputation if prior is None else None,
+        defer_llm=defer_llm,
+    )
+    return ThreadDecision(decision=decision, latest_id=latest.message_id, message_ids=new_ids)
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 from enum import Enum
-from pydantic import BaseModel, Field
 
 
 class JobLabel(str, Enum):
@@ -23,8 +22,10 @@ class Urgency(str, Enum):
     HIGH = "high"
 
 
-class EmailAnalysis(BaseModel):
-    label: JobLabel = Field(..., description="Job pipeline label to apply")
-    urgency: Urgency = Field(..., description="How time-sensitive this email is")
-    needs_reply: bool = Field(..., description="Should Anand reply to this email?")
-    reasoning_brief: str = Field(..., description="One short line why this label was chosen")
+def __getattr__(name: str):
+    # EmailAnalysis is a pydantic model: importing pydantic and building the schema costs ~100ms,
+    # which runs that never reach the LLM (state / reputation / rules) shouldn't pay at startup.
+    if name == "EmailAnalysis":
+        from email_agent.analysis_schema import EmailAnalysis
+        return EmailAnalysis
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
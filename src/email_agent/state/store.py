@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+# SQLite caps bound parameters per statement (999 on older builds)
+_IN_CHUNK = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    message_id     TEXT PRIMARY KEY,
+    thread_id      TEXT NOT NULL DEFAULT '',
+    from_email     TEXT NOT NULL DEFAULT '',
+    subject        TEXT NOT NULL DEFAULT '',
+    label          TEXT NOT NULL,
+    source         TEXT NOT NULL,
+    rule           TEXT,
+    latency_ms     REAL NOT NULL DEFAULT 0,
+    model          TEXT,
+    prompt_version TEXT,
+    processed_at   REAL NOT NULL
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_messages_processed_at ON messages(processed_at);
+CREATE INDEX IF NOT EXISTS idx_messages_thread ON messages(thread_id);
+
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at  REAL NOT NULL,
+    finished_at REAL,
+    checkpoint  TEXT,               -- last item fully handled; diagnostic only: runs resume from the messages table
+    checked     INTEGER NOT NULL DEFAULT 0,
+    labeled     INTEGER NOT NULL DEFAULT 0,
+    skipped     INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+@dataclass
+class MessageRecord:
+    message_id: str
+    thread_id: str
+    from_email: str
+    subject: str
+    label: str
+    source: str                 # "rule" | "llm" | "processed_label" | ...
+    rule: Optional[str]
+    latency_ms: float
+    model: Optional[str]
+    prompt_version: Optional[str]
+    processed_at: float
+
+
+class StateStore:
+    """
+    Local record of what the agent has already done.
+
+    One row per processed message (label, which tier/rule/model decided, latency)
+    plus run checkpoints. Lets the pipeline skip work before touching Gmail.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL is durable across app crashes, only loses the tail on power loss
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+
+    @classmethod
+    def from_env(cls) -> "StateStore":
+        return cls(os.getenv("STATE_DB_PATH", "state/sabaki.db"))
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # ---- messages ----
+
+    def seen_ids(self, message_ids: Iterable[str]) -> set[str]:
+        """Return the subset of message_ids already recorded (bulk, chunked IN lookups)."""
+        ids = list(message_ids)
+        seen: set[str] = set()
+        for i in range(0, len(ids), _IN_CHUNK):
+            chunk = ids[i : i + _IN_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT message_id FROM messages WHERE message_id IN ({marks})", chunk
+            )
+            seen.update(r[0] for r in rows)
+        return seen
+
+    def get(self, message_id: str) -> Optional[MessageRecord]:
+        row = self.conn.execute(
+            "SELECT message_id, thread_id, from_email, subject, label, source, rule, latency_ms,"
+            " model, prompt_version, processed_at FROM messages WHERE message_id = ?",
+            (message_id,),
+        ).fetchone()
+        return MessageRecord(*row) if row else None
+
+    def thread_label(self, thread_id: str) -> Optional[str]:
+        """Most recent label decided for any message of this thread."""
+        row = self.conn.execute(
+            "SELECT label FROM messages WHERE thread_id = ? AND label != ''"
+            " ORDER BY processed_at DESC LIMIT 1",
+            (thread_id,),
+        ).fetchone()
+        return row[0] if row else None
+
+    def record(
+        self,
+        *,
+        message_id: str,
+        label: str,
+        source: str,
+        thread_id: str = "",
+        from_email: str = "",
+        subject: str = "",
+        rule: Optional[str] = None,
+        latency_ms: float = 0.0,
+        model: Optional[str] = None,
+        prompt_version: Optional[str] = None,
+    ) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO messages (message_id, thread_id, from_email, subject, label, source,"
+            " rule, latency_ms, model, prompt_version, processed_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                message_id, thread_id, from_email, subject, label, source,
+                rule, latency_ms, model, prompt_version, time.time(),
+            ),
+        )
+        self.conn.commit()
+
+    def record_bulk(self, refs: Iterable[tuple[str, str]], *, label: str, source: str,
+                    rule: Optional[str] = None) -> None:
+        """One row per (message_id, thread_id) decided together without being fetched."""
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO messages (message_id, thread_id, label, source, rule, processed_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            [(mid, tid, label, source, rule, now) for mid, tid in refs],
+        )
+        self.conn.commit()
+
+    def mark_seen(self, message_ids: Iterable[str], source: str = "processed_label") -> None:
+        """Backfill rows for messages Gmail already carries PROCESSED on (label unknown locally)."""
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO messages (message_id, label, source, processed_at) VALUES (?, '', ?, ?)",
+            [(mid, source, now) for mid in message_ids],
+        )
+        self.conn.commit()
+
+    # ---- runs / checkpoints ----
+
+    def start_run(self) -> int:
+        cur = self.conn.execute("INSERT INTO runs (started_at) VALUES (?)", (time.time(),))
+        self.conn.commit()
+        return int(cur.lastrowid)
+
+    def checkpoint(self, run_id: int, cursor: str, *, checked: int, labeled: int, skipped: int) -> None:
+        self.conn.execute(
+            "UPDATE runs SET checkpoint = ?, checked = ?, labeled = ?, skipped = ? WHERE run_id = ?",
+            (cursor, checked, labeled, skipped, run_id),
+        )
+        self.conn.commit()
+
+    def finish_run(self, run_id: int, *, checked: int, labeled: int, skipped: int) -> None:
+        self.conn.execute(
+            "UPDATE runs SET finished_at = ?, checked = ?, labeled = ?, skipped = ? WHERE run_id = ?",
+            (time.time(), checked, labeled, skipped, run_id),
+        )
+        self.conn.commit()
+
+    # ---- maintenance ----
+
+    def compact(self, *, keep_days: float = 180.0) -> int:
+        """
+        Drop message rows older than keep_days and old finished runs, then
+        truncate the WAL and vacuum. Returns number of message rows removed.
+
+        Dropped messages still carry the Gmail PROCESSED label, so they are
+        skipped by the label check if they ever show up again.
+        """
+        cutoff = time.time() - keep_days * 86400
+        cur = self.conn.execute("DELETE FROM messages WHERE processed_at < ?", (cutoff,))
+        removed = cur.rowcount
+        self.conn.execute("DELETE FROM runs WHERE finished_at IS NOT NULL AND finished_at < ?", (cutoff,))
+        self.conn.commit()
+
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.conn.execute("VACUUM")
+        return removed